@@ -31,7 +31,7 @@ from datar.apis.base import (
     quantile,
     proportions,
 )
-from ..utils import is_null, is_scalar, make_array, numpy_version
+from ..utils import is_null, make_array, numpy_version
 
 
 @ceiling.register(object, backend="numpy")
@@ -58,9 +58,33 @@ def _mean(x, na_rm: bool = False):
     return np.nanmean(x) if na_rm else np.mean(x)
 
 
+def _drop_na(x, overwrite_input=False):
+    """Drop the NAs once with a mask, for quantile() and median()
+
+    Integer arrays can't have NAs and are passed as they are. Returns the
+    values and whether they can be overwritten, which is always the case
+    when they are a copy filtered here.
+    """
+    x = np.asarray(x)
+    if x.dtype.kind in "fc":
+        mask = np.isnan(x)
+    elif x.dtype.kind == "O":
+        mask = is_null(x)
+    else:
+        return x, overwrite_input
+
+    if not mask.any():
+        return x, overwrite_input
+    return x[~mask], True
+
+
 @median.register(object, backend="numpy")
-def _median(x, na_rm: bool = False):
-    return np.nanmedian(x) if na_rm else np.median(x)
+def _median(x, na_rm: bool = False, overwrite_input: bool = False):
+    if na_rm:
+        x, overwrite_input = _drop_na(x, overwrite_input)
+        if x.size == 0:
+            return np.nan
+    return np.median(x, overwrite_input=overwrite_input)
 
 
 @pmax.register(object, backend="numpy")
@@ -152,13 +176,46 @@ def _sign(x):
 
 
 @signif.register(object, backend="numpy")
-def _signif(x, digits: int = 6):
-    if is_scalar(x) and x == 0:
-        return x
-    digits = digits - np.ceil(np.log10(np.abs(x)))
-    digits = np.broadcast_arrays(0, digits.astype(int))  # type: ignore
-    digits = np.nanmax(digits, axis=0)
-    return np.vectorize(np.round)(x, digits)
+def _signif(x, digits: int = 6, out=None):
+    x = np.asarray(x)
+    if x.dtype.kind != "f":
+        x = x.astype(np.float64)
+    shape = np.broadcast_shapes(x.shape, np.shape(digits))
+    scalar = shape == () and out is None
+    if out is None:
+        out = np.empty(shape, dtype=x.dtype)
+    elif out.shape != shape:
+        raise ValueError(
+            f"In signif(...), `out` has shape {out.shape}, "
+            f"but the result has shape {shape}."
+        )
+    elif np.may_share_memory(x, out):
+        # x is read again after out is used for the decimals
+        x = x.copy()
+
+    # the decimals to round to, digits < 1 are treated as 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.abs(x, out=out)
+        np.log10(out, out=out)
+    np.floor(out, out=out)
+    np.subtract(np.maximum(digits, 1) - 1, out, out=out)
+    # 0, NaN and Inf (and denormals) are kept as they are
+    keep = ~np.isfinite(out) | (out > 308)
+    out[keep] = 0
+
+    # scale by the powers of ten in bulk, divide for negative decimals
+    # to avoid the inexact negative powers
+    pos = out >= 0
+    neg = ~pos
+    scale = np.power(10.0, np.abs(out))
+    np.multiply(x, scale, out=out, where=pos)
+    np.divide(x, scale, out=out, where=neg)
+    np.rint(out, out=out)
+    np.divide(out, scale, out=out, where=pos)
+    np.multiply(out, scale, out=out, where=neg)
+    np.copyto(out, x, where=keep)
+
+    return out[()] if scalar else out
 
 
 @trunc.register(object, backend="numpy")
@@ -224,6 +281,7 @@ def _quantile(
     names: bool = True,  # not supported
     type_: int = 7,
     digits: int | str = 7,  # not supported
+    overwrite_input: bool = False,
 ):
     methods = {
         1: "inverted_cdf",
@@ -241,10 +299,13 @@ def _quantile(
     else:  # pragma: no cover
         kw = {"method": methods.get(type_, type_)}
 
-    return (
-        np.nanquantile(x, probs, **kw)  # type: ignore
-        if na_rm
-        else np.quantile(x, probs, **kw)  # type: ignore
+    if na_rm:
+        x, overwrite_input = _drop_na(x, overwrite_input)
+        if x.size == 0:
+            return np.full(np.shape(probs), np.nan)
+    # all probs are selected by a single partition with multiple kth
+    return np.quantile(
+        x, probs, overwrite_input=overwrite_input, **kw  # type: ignore
     )
 
 
@@ -30,7 +30,12 @@ from datar.apis.base import (
     as_numeric,
 )
 
-from ..utils import is_scalar, is_null as _is_null_, make_array
+from ..utils import (
+    MatchIndex,
+    is_scalar,
+    is_null as _is_null_,
+    make_array,
+)
 from .constants import NULL
 
 
@@ -86,7 +91,17 @@ def _is_integer(x: Any) -> bool:
 
 @is_element.register(object, backend="numpy")
 def _is_element(x: Any, y: Any) -> NDArray[np.bool_]:
-    return np.isin(x, y)
+    # NA matches NA as in match(), so that a prebuilt index gives the same
+    # answer as the table
+    if not isinstance(y, MatchIndex):
+        xarr, yarr = np.asarray(x), np.asarray(y)
+        if xarr.dtype.kind in "biufc" and yarr.dtype.kind in "biufc":
+            out = np.isin(xarr, yarr)
+            if xarr.dtype.kind in "fc" and yarr.dtype.kind in "fc":
+                out |= np.isnan(xarr) & np.isnan(yarr).any()
+            return out
+        y = MatchIndex(y)
+    return y.lookup(x)[1].reshape(np.shape(x))
 
 
 @is_finite.register(object, backend="numpy")
@@ -4,6 +4,62 @@ import datetime
 import numpy as np
 from datar.apis.base import as_date
 
+from ..utils import is_null, make_array
+
+DEFAULT_ORIGIN = datetime.date(1969, 12, 31)
+DEFAULT_TRY_FORMATS = (
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S",
+)
+
+# The layouts with a fast path: separator and length of the strings
+_ISO_LAYOUTS = {
+    "%Y-%m-%d": ("-", 10),
+    "%Y/%m/%d": ("/", 10),
+    "%Y-%m-%d %H:%M:%S": ("-", 19),
+    "%Y/%m/%d %H:%M:%S": ("/", 19),
+}
+# How many values to detect the format from
+_SAMPLE_SIZE = 10
+# The formats detected for the layouts of the sample values
+_FORMAT_CACHE: dict = {}
+_FORMAT_CACHE_SIZE = 128
+_DIGITS_TO_ZERO = str.maketrans("0123456789", "0" * 10)
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _tz_delta(tz):
+    """Turn the time zone offset in hours into a timedelta"""
+    if isinstance(tz, (int, np.integer)):
+        return datetime.timedelta(hours=int(tz))
+    return tz
+
+
+def _strptime(x: str, format=None, try_formats=None, optional=False):
+    """Parse a string into a datetime with the format or the formats to try
+
+    Returns None if none of the formats works and `optional` is True.
+    """
+    if format:
+        formats = [format]
+    else:
+        formats = try_formats or DEFAULT_TRY_FORMATS
+
+    for fmt in formats:
+        try:
+            return datetime.datetime.strptime(x, fmt)
+        except ValueError:
+            continue
+
+    if optional:
+        return None
+
+    raise ValueError(
+        "character string is not in a standard unambiguous format"
+    )
+
 
 @as_date.register(np.datetime64, backend="numpy")
 def _(
@@ -15,16 +71,9 @@ def _(
     tz=0,
     origin=None,
 ):
-    return as_date(
-        x.item(),
-        format=format,
-        try_formats=try_formats,
-        optional=optional,
-        tz=tz,
-        origin=origin,
-        __ast_fallback="normal",  # type: ignore
-        __backend="numpy",  # type: ignore
-    )
+    # truncated in datetime64 arithmetic, so that datetime64[ns] is not
+    # turned into an integer by .item()
+    return (x + np.timedelta64(_tz_delta(tz))).astype("M8[D]").item()
 
 
 @as_date.register(datetime.date, backend="numpy")
@@ -37,10 +86,7 @@ def _as_date_d(
     tz=0,
     origin=None,
 ):
-    if isinstance(tz, (int, np.integer)):
-        tz = datetime.timedelta(hours=int(tz))
-
-    return x + tz
+    return x + _tz_delta(tz)
 
 
 @as_date.register(datetime.datetime, backend="numpy")
@@ -53,10 +99,7 @@ def _as_date_dt(
     tz=0,
     origin=None,
 ):
-    if isinstance(tz, (int, np.integer)):
-        tz = datetime.timedelta(hours=int(tz))
-
-    return (x + tz).date()
+    return (x + _tz_delta(tz)).date()
 
 
 @as_date.register(str, backend="numpy")
@@ -69,32 +112,11 @@ def _as_date_str(
     tz=0,
     origin=None,
 ):
-    if isinstance(tz, (int, np.integer)):
-        tz = datetime.timedelta(hours=int(tz))
-
-    try_formats = try_formats or [
-        "%Y-%m-%d",
-        "%Y/%m/%d",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y/%m/%d %H:%M:%S",
-    ]
-    if not format:
-        format = try_formats
-    else:
-        format = [format]
-
-    for fmt in format:
-        try:
-            return (datetime.datetime.strptime(x, fmt) + tz).date()
-        except ValueError:
-            continue
-
-    if optional:
+    dt = _strptime(x, format, try_formats, optional)
+    if dt is None:
         return np.nan
 
-    raise ValueError(
-        "character string is not in a standard unambiguous format"
-    )
+    return (dt + _tz_delta(tz)).date()
 
 
 @as_date.register((int, np.integer), backend="numpy")
@@ -107,22 +129,183 @@ def _as_date_int(
     tz=0,
     origin=None,
 ):
-    if isinstance(tz, (int, np.integer)):
-        tz = datetime.timedelta(hours=int(tz))
-
     if isinstance(origin, str):
         origin = _as_date_str(origin)
 
     if origin is None:  # pragma: no cover
-        origin = datetime.date(1969, 12, 31)
+        origin = DEFAULT_ORIGIN
 
-    dt = origin + datetime.timedelta(days=int(x)) + tz
+    dt = origin + datetime.timedelta(days=int(x)) + _tz_delta(tz)
 
     if isinstance(dt, datetime.datetime):
         return dt.date()
     return dt
 
 
+def _origin64(origin) -> np.datetime64:
+    """Get the origin as a datetime64"""
+    if isinstance(origin, str):
+        origin = _as_date_str(origin)
+    if origin is None:
+        origin = DEFAULT_ORIGIN
+    return np.datetime64(origin)
+
+
+def _parses_all(sample, fmt) -> bool:
+    """Whether all the sample values can be parsed with the format"""
+    try:
+        for elem in sample:
+            datetime.datetime.strptime(elem, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+def _detect_format(sample, formats):
+    """Detect the format from the sample values, with the one detected for
+    the same layout of values (digits ignored) tried first
+
+    Returns None if no format parses all the sample values.
+    """
+    key = (tuple(formats), sample[0].translate(_DIGITS_TO_ZERO))
+    cached = _FORMAT_CACHE.get(key)
+    if cached is not None and _parses_all(sample, cached):
+        return cached
+
+    for fmt in formats:
+        if _parses_all(sample, fmt):
+            if len(_FORMAT_CACHE) >= _FORMAT_CACHE_SIZE:
+                del _FORMAT_CACHE[next(iter(_FORMAT_CACHE))]
+            _FORMAT_CACHE[key] = fmt
+            return fmt
+
+    return None
+
+
+def _parse_iso(x, fmt):
+    """Parse the strings with a fixed ISO-like layout in bulk
+
+    The layout and the ranges of the fields are validated on the code
+    points of the strings and the values are parsed by numpy. Returns the
+    parsed datetimes and the mask of the strings parsed, the others need
+    to be parsed one by one.
+    """
+    sep, length = _ISO_LAYOUTS[fmt]
+    ok = np.strings.str_len(x) == length
+    cands = x[ok].astype(f"<U{length}")
+    codes = cands.view(np.uint32).reshape(-1, length)
+
+    seps = {4: sep, 7: sep}
+    if length > 10:
+        seps.update({10: " ", 13: ":", 16: ":"})
+    digits = [i for i in range(length) if i not in seps]
+    valid = ((codes[:, digits] >= 48) & (codes[:, digits] <= 57)).all(axis=1)
+    for i, char in seps.items():
+        valid &= codes[:, i] == ord(char)
+
+    # the fields out of range (i.e. 2020-02-30) are left to strptime
+    codes = codes.astype(np.int64) - 48
+
+    def field(start, stop):
+        out = codes[:, start]
+        for i in range(start + 1, stop):
+            out = out * 10 + codes[:, i]
+        return out
+
+    year, month, day = field(0, 4), field(5, 7), field(8, 10)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days = _DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + (leap & (month == 2))
+    valid &= (year >= 1) & (month >= 1) & (month <= 12)
+    valid &= (day >= 1) & (day <= days)
+    if length > 10:
+        valid &= field(11, 13) <= 23
+        valid &= field(14, 16) <= 59
+        valid &= field(17, 19) <= 59
+
+    cands = cands[valid]
+    if sep != "-":
+        cands = np.strings.replace(cands, sep, "-")
+    if length > 10:
+        cands = np.strings.replace(cands, " ", "T")
+
+    ok[ok] = valid
+    return cands.astype("M8[s]"), ok
+
+
+def _as_date_strs(x, format, try_formats, optional):
+    """Parse an array of strings
+
+    Without `format`, the format is detected from a sample of the values.
+    Values in a fixed ISO layout are parsed in bulk, the rest are parsed
+    once for each distinct string, with the detected format tried first.
+    """
+    shape = x.shape
+    x = x.ravel()
+    if format:
+        formats = [format]
+    else:
+        formats = list(try_formats or DEFAULT_TRY_FORMATS)
+        format = (
+            _detect_format(x[:_SAMPLE_SIZE].tolist(), formats)
+            if x.size > 0
+            else None
+        )
+        if format is not None:
+            formats.remove(format)
+            formats.insert(0, format)
+
+    out = np.full(x.shape, np.datetime64("NaT"), dtype="M8[s]")
+    todo = np.ones(x.shape, dtype=bool)
+    if format in _ISO_LAYOUTS:
+        parsed, done = _parse_iso(x, format)
+        out[done] = parsed
+        todo = ~done
+
+    if todo.any():
+        uniq, inverse = np.unique(x[todo], return_inverse=True)
+        out[todo] = np.array(
+            [
+                _strptime(elem, None, formats, optional)
+                for elem in uniq.tolist()
+            ],
+            dtype="M8[s]",
+        )[inverse]
+
+    return out.reshape(shape)
+
+
+def _as_date_objs(x, format, try_formats, optional, origin):
+    """Convert an object array to datetime64 element by element, with the
+    strings parsed in bulk"""
+    out = np.full(x.shape, np.datetime64("NaT"), dtype="M8[us]")
+    notna = ~is_null(x)
+    values = x[notna]
+    if all(isinstance(elem, str) for elem in values.tolist()):
+        out[notna] = _as_date_strs(
+            values.astype(str), format, try_formats, optional
+        )
+        return out
+
+    origin = _origin64(origin)
+
+    def convert(elem):
+        if isinstance(elem, str):
+            return _strptime(elem, format, try_formats, optional)
+        if isinstance(elem, (int, np.integer)):
+            return origin + np.timedelta64(int(elem), "D")
+        if isinstance(elem, (datetime.date, np.datetime64)):
+            return elem
+        # Let the dispatcher raise
+        return as_date(
+            elem,
+            __ast_fallback="normal",  # type: ignore
+            __backend="numpy",  # type: ignore
+        )
+
+    out[notna] = np.array([convert(elem) for elem in values], dtype="M8[us]")
+    return out
+
+
 @as_date.register((list, tuple, np.ndarray), backend="numpy")
 def _as_date_iter(
     x,
@@ -132,20 +315,30 @@ def _as_date_iter(
     optional=False,
     tz=0,
     origin=None,
+    dtype=None,
 ):
-    return np.array(
-        [
-            as_date(
-                el,
-                format=format,
-                try_formats=try_formats,
-                optional=optional,
-                origin=origin,
-                tz=tz,
-                __ast_fallback="normal",  # type: ignore
-                __backend="numpy",  # type: ignore
-            )
-            for el in x
-        ],
-        dtype=object,
-    )
+    """Convert the elements in bulk with datetime64 arithmetic
+
+    With `dtype="datetime64[D]"`, a compact datetime64 array is returned,
+    otherwise an object array of `datetime.date`, with NAs as `np.nan`.
+    """
+    x = make_array(x)
+    kind = x.dtype.kind
+    if kind in "iu":
+        out = _origin64(origin) + x.astype("m8[D]")
+    elif kind == "M":
+        out = x
+    elif kind in "US":
+        out = _as_date_strs(x.astype(str), format, try_formats, optional)
+    else:
+        out = _as_date_objs(x, format, try_formats, optional, origin)
+
+    # the time parts are truncated after the time zone offset is applied
+    out = (out + np.timedelta64(_tz_delta(tz))).astype("M8[D]")
+    if dtype is not None and dtype is not object:
+        return out.astype(dtype, copy=False)
+
+    nat = np.isnat(out)
+    out = out.astype(object)
+    out[nat] = np.nan
+    return out
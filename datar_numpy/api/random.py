@@ -1,6 +1,6 @@
-
 import builtins
 import random as _random
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from datar.apis.base import (
@@ -15,54 +15,187 @@ from datar.apis.base import (
 )
 from ..utils import is_scalar
 
+# The seed sequence that all the random numbers derive from, and the
+# generator of the main stream
+_seed_seq = np.random.SeedSequence()
+_rng = np.random.Generator(np.random.PCG64(_seed_seq))
+# The size of the scratch buffer of the generators that draw twice
+_SCRATCH_SIZE = 8192
+
+
+def _generator():
+    """The generator of the main stream, reset by set_seed()"""
+    return _rng
+
+
+def _chunk_param(param, n, start, stop):
+    """Take the chunk of a parameter that is given for every number"""
+    # Don't involve the Index from Series in arithmetics
+    # which is error-prone
+    param = getattr(param, "values", param)
+    if np.ndim(param) > 0 and np.size(param) == n:
+        return np.asarray(param)[start:stop]
+    return param
+
+
+def _check_param(fun, name, value, positive=False):
+    """Check that a scale parameter is non-negative, or positive"""
+    value = getattr(value, "values", value)
+    bad = np.less_equal(value, 0) if positive else np.less(value, 0)
+    if np.any(bad):
+        raise ValueError(
+            f"In {fun}(...), `{name}` must be "
+            f"{'positive' if positive else 'non-negative'}."
+        )
+
+
+def _output(fun, n, out, dtype, default=np.float64):
+    """Get the array to fill, either `out` or a new one of `dtype`"""
+    if out is None:
+        return np.empty(n, dtype=default if dtype is None else dtype)
+
+    if out.size != n:
+        raise ValueError(
+            f"In {fun}(...), `out` has size {out.size}, but `n` is {n}."
+        )
+    if dtype is not None and np.dtype(dtype) != out.dtype:
+        raise ValueError(
+            f"In {fun}(...), `dtype` doesn't match the dtype of `out`."
+        )
+    return out
+
+
+def _fill(out, fill, params, threads=None):
+    """Fill `out` with `fill(generator, out, *params)`
+
+    With `threads > 1`, `out` is split into as many contiguous chunks, each
+    filled in a thread pool by a generator of its own, spawned from the
+    seed sequence. The numbers then only depend on the seed and the number
+    of threads.
+    """
+    n = out.size
+    if threads is None or threads <= 1:
+        fill(_rng, out, *(_chunk_param(p, n, 0, n) for p in params))
+        return out
+
+    bounds = np.linspace(0, n, threads + 1).astype(np.intp)
+    children = _seed_seq.spawn(threads)
+
+    def fill_chunk(i):
+        start, stop = bounds[i], bounds[i + 1]
+        fill(
+            np.random.Generator(np.random.PCG64(children[i])),
+            out[start:stop],
+            *(_chunk_param(p, n, start, stop) for p in params),
+        )
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(fill_chunk, range(threads)))
+    return out
+
+
+def _fill_normal(gen, out, mean, sd):
+    gen.standard_normal(out=out, dtype=out.dtype)
+    out *= sd
+    out += mean
+
+
+def _fill_uniform(gen, out, min, max):
+    gen.random(out=out, dtype=out.dtype)
+    out *= max - min
+    out += min
+
+
+def _fill_poisson(gen, out, lambda_):
+    out[...] = gen.poisson(lambda_, out.size)
+
+
+def _fill_binomial(gen, out, size, prob):
+    out[...] = gen.binomial(size, prob, out.size)
+
+
+def _fill_cauchy(gen, out, location, scale):
+    # standard cauchy is the ratio of two standard normals, the divisors
+    # are drawn chunk by chunk into a small scratch buffer
+    gen.standard_normal(out=out, dtype=out.dtype)
+    scratch = np.empty(min(out.size, _SCRATCH_SIZE), dtype=out.dtype)
+    for start in range(0, out.size, _SCRATCH_SIZE):
+        chunk = out[start:start + _SCRATCH_SIZE]
+        divisor = scratch[: chunk.size]
+        gen.standard_normal(out=divisor, dtype=out.dtype)
+        chunk /= divisor
+    out *= scale
+    out += location
+
+
+def _fill_chisq(gen, out, df):
+    # chi-squared(df) is 2 * gamma(df / 2), which fills out in place
+    gen.standard_gamma(np.divide(df, 2), out=out, dtype=out.dtype)
+    out *= 2
+
+
+def _fill_exp(gen, out, rate):
+    gen.standard_exponential(out=out, dtype=out.dtype)
+    out /= rate
+
 
 @set_seed.register(object, backend="numpy")
 def _set_seed(seed):
+    global _seed_seq, _rng
     _random.seed(seed)
     np.random.seed(seed)
+    _seed_seq = np.random.SeedSequence(seed)
+    _rng = np.random.Generator(np.random.PCG64(_seed_seq))
 
 
 @rnorm.register(object, backend="numpy")
-def _rnorm(n, mean=0, sd=1):
+def _rnorm(n, mean=0, sd=1, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else max(n)
-    return np.random.normal(mean, sd, n)
+    _check_param("rnorm", "sd", sd)
+    out = _output("rnorm", n, out, dtype)
+    return _fill(out, _fill_normal, (mean, sd), threads)
 
 
 @runif.register(object, backend="numpy")
-def _runif(n, min=0, max=1):
+def _runif(n, min=0, max=1, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else builtins.max(n)
-    return np.random.uniform(min, max, n)
+    out = _output("runif", n, out, dtype)
+    return _fill(out, _fill_uniform, (min, max), threads)
 
 
 @rpois.register(object, backend="numpy")
-def _rpois(n, lambda_):
+def _rpois(n, lambda_, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else max(n)
-    return np.random.poisson(lambda_, n)
+    out = _output("rpois", n, out, dtype, np.int64)
+    return _fill(out, _fill_poisson, (lambda_,), threads)
 
 
 @rbinom.register(object, backend="numpy")
-def _rbinom(n, size, prob):
+def _rbinom(n, size, prob, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else max(n)
-    return np.random.binomial(size, prob, n)
+    out = _output("rbinom", n, out, dtype, np.int64)
+    return _fill(out, _fill_binomial, (size, prob), threads)
 
 
 @rcauchy.register(object, backend="numpy")
-def _rcauchy(n, location=0, scale=1):
+def _rcauchy(n, location=0, scale=1, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else max(n)
-    # Don't involve the Index from Series in arithmetics
-    # which is error-prone
-    scale = getattr(scale, "values", scale)
-    location = getattr(location, "values", location)
-    return np.random.standard_cauchy(n) * scale + location
+    _check_param("rcauchy", "scale", scale)
+    out = _output("rcauchy", n, out, dtype)
+    return _fill(out, _fill_cauchy, (location, scale), threads)
 
 
 @rchisq.register(object, backend="numpy")
-def _rchisq(n, df):
+def _rchisq(n, df, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else max(n)
-    return np.random.chisquare(df, n)
+    _check_param("rchisq", "df", df, positive=True)
+    out = _output("rchisq", n, out, dtype)
+    return _fill(out, _fill_chisq, (df,), threads)
 
 
 @rexp.register(object, backend="numpy")
-def _rexp(n, rate=1):
+def _rexp(n, rate=1, threads=None, out=None, dtype=None):
     n = n if is_scalar(n) else max(n)
-    return np.random.exponential(1 / rate, n)
+    _check_param("rexp", "rate", rate, positive=True)
+    out = _output("rexp", n, out, dtype)
+    return _fill(out, _fill_exp, (rate,), threads)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Sequence
+
 import numpy as np
 from numpy.typing import NDArray
 
@@ -19,8 +21,28 @@ from datar.apis.base import (
     seq_len,
     match,
 )
-from ..utils import is_null, make_array, is_scalar
+from ..utils import MatchIndex, RaggedArray, is_null, make_array, is_scalar
 from .asis import _is_type
+from .random import _generator
+
+
+def _recycle(block, length):
+    """Recycle the block to the given length
+
+    The output buffer is the only allocation: the block is copied in once
+    and the filled part is then doubled in place until the end.
+    """
+    filled = min(block.size, length)
+    if filled == 0:
+        return np.empty(0, dtype=block.dtype)
+
+    out = np.empty(length, dtype=block.dtype)
+    out[:filled] = block[:filled]
+    while filled < length:
+        step = min(filled, length - filled)
+        out[filled:filled + step] = out[:step]
+        filled += step
+    return out
 
 
 @rep.register(object, backend="numpy")
@@ -30,7 +52,7 @@ def _rep(
     length=None,
     each=1,
 ):
-    x = make_array(x)
+    x = make_array(x).ravel()
     times = make_array(times)
     length = make_array(length)
     each = make_array(each)
@@ -59,19 +81,15 @@ def _rep(
             )
 
     if is_scalar(times) and isinstance(times, (int, np.integer)):
-        times_int = int(times)
-        x = np.tile(np.repeat(x, each), times_int)
-    else:
-        x = np.repeat(x, times)
-
-    if length is None:
-        return x
-
-    length_int = int(length)
-    repeats = length_int // x.size + 1
-    x = np.tile(x, repeats)
+        block = x if each == 1 else np.repeat(x, each)
+        # length overrides times
+        return _recycle(
+            block,
+            block.size * int(times) if length is None else int(length),
+        )
 
-    return x[:length_int]
+    x = np.repeat(x, times)
+    return x if length is None else _recycle(x, int(length))
 
 
 @c_.register(object, backend="numpy")
@@ -86,6 +104,9 @@ def _length(x):
 
 @lengths.register(object, backend="numpy")
 def _lengths(x) -> NDArray[np.int_]:
+    if isinstance(x, RaggedArray):
+        return x.lengths()
+
     return (
         np.array([1], dtype=int)
         if is_scalar(x)
@@ -93,22 +114,124 @@ def _lengths(x) -> NDArray[np.int_]:
     )
 
 
+def _order_key(values, decreasing):
+    """A key of the values that sorts ascending in the wanted order"""
+    if not decreasing:
+        return values
+
+    kind = values.dtype.kind
+    if kind in "fc":
+        return -values
+    if kind in "mM":
+        values = values.view(np.int64)
+        kind = "i"
+    if kind in "iub":
+        # reverses the order without overflowing
+        return ~values
+    return -np.unique(values, return_inverse=True)[1]
+
+
+def _stable_argsort(key):
+    """Argsort with the ties kept in their original order
+
+    For wide numbers, the default argsort is much faster than a stable one,
+    so the ties, if any, are put back in order afterwards instead.
+    """
+    if key.dtype.kind not in "fciumM" or key.dtype.itemsize < 4:
+        return np.argsort(key, kind="stable")
+
+    out = np.argsort(key)
+    sorted_key = key[out]
+    ties = sorted_key[1:] == sorted_key[:-1]
+    if ties.any():
+        size = out.size
+        # sort the indices within the runs of ties
+        combined = np.zeros(size, dtype=np.int64)
+        np.cumsum(~ties, out=combined[1:])
+        combined *= size
+        combined += out
+        combined.sort()
+        out = combined % size
+    return out
+
+
+def _top_k(key, k):
+    """The indices of the k smallest keys in a stable order, in O(n)
+
+    The k-th smallest key is found by a partition. The keys smaller than
+    it, and the first ones equal to it, are then the only ones sorted.
+    """
+    kth = np.partition(key, k - 1)[k - 1]
+    less = np.flatnonzero(key < kth)
+    equal = np.flatnonzero(key == kth)[: k - less.size]
+    cand = np.sort(np.concatenate([less, equal]))
+    return cand[np.argsort(key[cand], kind="stable")]
+
+
+def _order_one(x, decreasing, na_last, k):
+    """Order a single key, with the NAs put aside"""
+    na = is_null(x)
+    has_na = na.any()
+    values = x[~na] if has_na else x
+    key = _order_key(values, decreasing)
+    if k is not None and 0 < k < values.size:
+        out = _top_k(key, k)
+    else:
+        out = _stable_argsort(key)
+
+    if has_na:
+        out = np.flatnonzero(~na)[out]
+        na_idx = np.flatnonzero(na)
+        out = np.concatenate([out, na_idx] if na_last else [na_idx, out])
+    return out if k is None else out[:k]
+
+
 @order.register(object, backend="numpy")
-def _order(x, decreasing: bool = False, na_last: bool = True):
-    and_ = not na_last and decreasing
-    or_ = not na_last or decreasing
-    na = -np.inf if or_ and not and_ else np.inf
+def _order(
+    x,
+    decreasing: bool | Sequence[bool] = False,
+    na_last: bool = True,
+    k: int | None = None,
+):
+    # a tuple of vectors is ordered by the keys in turn
+    if isinstance(x, tuple) and x and not any(map(is_scalar, x)):
+        keys = [make_array(key).ravel() for key in x]
+    else:
+        keys = [make_array(x).ravel()]
+
+    if is_scalar(decreasing):
+        decreasing = [decreasing] * len(keys)
+    if len(decreasing) != len(keys):
+        raise ValueError(
+            "In order(...), `decreasing` should be a scalar or have "
+            "the same length as the keys."
+        )
+    if len(set(key.size for key in keys)) > 1:
+        raise ValueError("In order(...), the keys have different lengths.")
 
-    x = make_array(x)
-    x = np.where(is_null(x), na, x)
-    out = np.argsort(x)
+    if len(keys) == 1:
+        return _order_one(keys[0], decreasing[0], na_last, k)
+
+    # np.lexsort() takes the last key as the primary one
+    sort_keys = []
+    for key, desc in zip(reversed(keys), reversed(decreasing)):
+        na = is_null(key)
+        if na.any():
+            if not na.all():
+                key = key.copy()
+                key[na] = key[~na][0]
+                sort_keys.append(_order_key(key, desc))
+            sort_keys.append(na if na_last else ~na)
+        else:
+            sort_keys.append(_order_key(key, desc))
 
-    return out[::-1] if decreasing else out
+    out = np.lexsort(sort_keys)
+    return out if k is None else out[:k]
 
 
 @sort.register(object, backend="numpy")
 def _sort(x, decreasing: bool = False, na_last: bool = True):
-    x = make_array(x)
+    x = make_array(x).ravel()
     idx = order(
         x,
         decreasing=decreasing,
@@ -120,19 +243,73 @@ def _sort(x, decreasing: bool = False, na_last: bool = True):
     return x[idx]
 
 
+_TIES_METHODS = (
+    "average", "first", "last", "random", "max", "min", "dense", "ordinal"
+)
+
+
 @rank.register(object, backend="numpy")
-def _rank(x, na_last: bool = True, ties_method: str = "average"):
-    if not na_last:
-        raise NotImplementedError("na_last=False is not supported yet")
+def _rank(x, na_last: bool | str = True, ties_method: str = "average"):
+    if ties_method not in _TIES_METHODS:
+        raise ValueError(
+            "In rank(...), `ties_method` should be one of 'average', "
+            "'first', 'last', 'random', 'max', 'min' and 'dense', "
+            f"got {ties_method!r}."
+        )
 
-    try:
-        from scipy import stats
-    except ImportError as imperr:  # pragma: no cover
-        raise ImportError(
-            "`rank` requires `scipy` package.\n" "Try: pip install -U scipy"
-        ) from imperr
+    x = make_array(x).ravel()
+    na = is_null(x)
+    has_na = na.any()
+    values = x[~na] if has_na else x
+    size = values.size
 
-    return stats.rankdata(x, method=ties_method)
+    if ties_method == "random":
+        # a stable sort after shuffling breaks the ties randomly
+        perm = _generator().permutation(size)
+        sorter = perm[np.argsort(values[perm], kind="stable")]
+    else:
+        sorter = np.argsort(values, kind="stable")
+
+    sorted_values = values[sorter]
+    # run-length detection of the ties
+    new_run = np.ones(size, dtype=bool)
+    new_run[1:] = sorted_values[1:] != sorted_values[:-1]
+    run_id = np.cumsum(new_run) - 1
+    starts = np.flatnonzero(new_run)
+    ends = np.append(starts[1:], size)
+
+    if ties_method in ("first", "random", "ordinal"):
+        ranks = np.arange(1, size + 1)
+    elif ties_method == "last":
+        ranks = starts[run_id] + ends[run_id] - np.arange(size)
+    elif ties_method == "min":
+        ranks = starts[run_id] + 1
+    elif ties_method == "max":
+        ranks = ends[run_id]
+    elif ties_method == "dense":
+        ranks = run_id + 1
+    else:  # average
+        ranks = (starts + 1 + ends)[run_id] / 2.0
+
+    out = np.empty(size, dtype=ranks.dtype)
+    out[sorter] = ranks
+    if not has_na:
+        return out
+
+    if na_last == "keep":
+        full = np.full(x.size, np.nan)
+        full[~na] = out
+        return full
+
+    n_na = x.size - size
+    full = np.empty(x.size, dtype=ranks.dtype)
+    if na_last:
+        full[~na] = out
+        full[na] = np.arange(size + 1, x.size + 1)
+    else:
+        full[~na] = out + n_na
+        full[na] = np.arange(1, n_na + 1)
+    return full
 
 
 @rev.register(object, backend="numpy")
@@ -151,7 +328,15 @@ def _sample(
     x = make_array(x)
     size = x.size if size is None else int(size)
 
-    return np.random.choice(x, size, replace=replace, p=prob)
+    return _generator().choice(x, size, replace=replace, p=prob)
+
+
+def _arith_seq(from_, by, length_out, dtype):
+    """Make `from_ + (0:(length_out-1)) * by` in place, without iterating"""
+    out = np.arange(length_out, dtype=dtype)
+    out *= by
+    out += from_
+    return out
 
 
 @seq.register(object, backend="numpy")
@@ -161,45 +346,89 @@ def _seq(
     by=None,
     length_out=None,
     along_with=None,
+    dtype=None,
 ):
     if along_with is not None:
-        return seq_along(
+        out = seq_along(
             along_with,
             __backend="numpy",  # type: ignore
             __ast_fallback="normal",  # type: ignore
         )
+        return out if dtype is None else out.astype(dtype, copy=False)
 
     if not is_scalar(from_):
-        return seq_along(
+        out = seq_along(
             from_,
             __backend="numpy",  # type: ignore
             __ast_fallback="normal",  # type: ignore
         )
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    inferred = dtype is None
+    if inferred:
+        # keep integers when all the inputs are integers
+        args = [arg for arg in (from_, to, by) if arg is not None]
+        integer = all(isinstance(arg, (int, np.integer)) for arg in args)
+        if not integer:
+            dtype = np.float64
+        elif args and np.result_type(*args).kind in "iu":
+            dtype = np.result_type(*args)
+        else:
+            dtype = np.int64
 
     if length_out is not None and from_ is None and to is None:
-        return seq_len(
+        if by is not None:
+            return _arith_seq(1, by, int(np.ceil(length_out)), dtype)
+
+        out = seq_len(
             length_out,
             __backend="numpy",  # type: ignore
             __ast_fallback="normal",  # type: ignore
         )
+        return out if inferred else out.astype(dtype, copy=False)
+
+    if length_out is not None:
+        length_out = int(np.ceil(length_out))
+        if from_ is not None and to is not None:
+            if by is not None:
+                raise ValueError(
+                    "In seq(...), too many arguments: "
+                    "`from_`, `to`, `by` and `length_out` all provided"
+                )
+            if inferred and np.issubdtype(dtype, np.integer):
+                dtype = np.float64
+            return np.linspace(from_, to, length_out, dtype=dtype)
+
+        if by is None:
+            by = 1
+        if from_ is None:
+            from_ = to - (length_out - 1) * by
+        return _arith_seq(from_, by, length_out, dtype)
 
     if from_ is None:
         from_ = 1
     if to is None:
         from_, to = 1, from_
 
-    assert from_ is not None
-    assert to is not None
-
-    if length_out is not None:
-        by = (float(to) - float(from_)) / float(length_out)
-    elif by is None:
-        by = 1 if to > from_ else -1
-        length_out = to - from_ + 1 if to > from_ else from_ - to + 1
+    if by is None:
+        by = 1 if to >= from_ else -1
+    elif by == 0:
+        if from_ == to:
+            return np.array([from_], dtype=dtype)
+        raise ValueError("In seq(...), invalid `by` argument: 0")
+
+    # Same tolerance as R for the floating point errors
+    n = (to - from_) / by + 1e-10
+    if n < 0:
+        raise ValueError("In seq(...), wrong sign in `by` argument")
+
+    out = _arith_seq(from_, by, int(n) + 1, dtype)
+    # like R, the floating point errors can't go beyond `to`
+    if by > 0:
+        out[-1] = min(out[-1], to)
     else:
-        length_out = (to - from_ + 1.1 * by) // by
-
-    return np.array([from_ + n * by for n in range(int(length_out))])
+        out[-1] = max(out[-1], to)
+    return out
 
 
 @seq_along.register(object, backend="numpy")
@@ -227,8 +456,9 @@ def _seq_len_int(length_out):
 
 @match.register(object, backend="numpy")
 def _match(x, table, nomatch=-1):
-    sorter = np.argsort(table)
-    searched = np.searchsorted(table, x, sorter=sorter).ravel()
-    out = sorter.take(searched, mode="clip")
-    out[~np.isin(x, table)] = nomatch
+    if not isinstance(table, MatchIndex):
+        table = MatchIndex(table)
+
+    out, found = table.lookup(x)
+    out[~found] = nomatch
     return out
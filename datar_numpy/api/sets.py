@@ -1,4 +1,5 @@
 import numpy as np
+from numpy.typing import NDArray
 from datar.apis.base import (
     all_,
     any_,
@@ -16,7 +17,77 @@ from datar.apis.base import (
     tail,
 )
 
-from ..utils import make_array, is_null
+from ..utils import MatchIndex, NA_KEY, make_array, is_null
+
+
+def _first_mask(x: np.ndarray) -> NDArray[np.bool_]:
+    """Mask the first occurrences of the values in a 1-d array
+
+    The order of appearance is kept without sorting the unique values.
+    Integers in a compact range go through a direct-address table, object
+    arrays through a hash table, and the rest through a single argsort.
+    All NAs are considered as the same value.
+    """
+    n = x.size
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+
+    if x.dtype.kind == "O":
+        keys = x.tolist()
+        for i in np.flatnonzero(is_null(x)):
+            keys[i] = NA_KEY
+        # later (reversed) occurrences are overwritten by earlier ones
+        first = dict(zip(reversed(keys), range(n - 1, -1, -1)))
+        idx = np.fromiter(first.values(), dtype=np.intp, count=len(first))
+        mask[idx] = True
+        return mask
+
+    if x.dtype.kind in "mM":
+        # NaTs are equal to each other as integers
+        x = x.view(np.int64)
+    elif x.dtype.kind == "b":
+        x = x.view(np.uint8)
+
+    if x.dtype.kind in "iu":
+        lo = x.min()
+        span = int(x.max()) - int(lo) + 1
+        if span <= 4 * n:
+            codes = np.subtract(
+                x,
+                lo,
+                dtype=np.int64 if x.dtype.kind == "i" else np.uint64,
+            ).astype(np.intp)
+            first = np.full(span, n, dtype=np.intp)
+            np.minimum.at(first, codes, np.arange(n))
+            mask[first[first < n]] = True
+            return mask
+
+    order = np.argsort(x)
+    ordered = x[order]
+    new = np.empty(n, dtype=bool)
+    new[0] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=new[1:])
+    if x.dtype.kind in "fc":
+        # NaNs are sorted to the end, keep only the first one
+        new[1:] &= ~np.isnan(ordered[1:]) | ~np.isnan(ordered[:-1])
+    # the first occurrence of a value is the smallest index in its run
+    mask[np.minimum.reduceat(order, np.flatnonzero(new))] = True
+    return mask
+
+
+def _in_unique(x: np.ndarray, y: np.ndarray) -> NDArray[np.bool_]:
+    """Mask the elements of x that are in y, x being unique"""
+    if x.dtype.kind not in "biufc" or y.dtype.kind not in "biufc":
+        # An element of x is not a first occurrence after y only when
+        # it is in y
+        return ~_first_mask(np.concatenate([y, x]))[y.size:]
+
+    out = np.isin(x, y)
+    if x.dtype.kind in "fc" and y.dtype.kind in "fc":
+        # np.isin() doesn't match NaNs
+        out |= np.isnan(x) & np.isnan(y).any()
+    return out
 
 
 @all_.register(object, backend="numpy")
@@ -72,14 +143,19 @@ def _diff(x, lag: int = 1, differences: int = 1):
     return np.diff(x, n=differences)
 
 
-@duplicated.register(object, backend="numpy")
-def _duplicated(x, incomparables=None, from_last: bool = False):
+def _duplicated_obj(x, incomparables, from_last):
+    """Python-level duplicated() for object arrays, all NAs are
+    considered as the same value"""
     dups = set()
     out = []
     out_append = out.append
-    if incomparables is None:
-        incomparables = []
+    incomparables = [
+        NA_KEY if isna else elem
+        for elem, isna in zip(incomparables, is_null(incomparables))
+    ]
 
+    if x.ndim == 1:
+        x = np.where(is_null(x), NA_KEY, x)
     if from_last:
         x = reversed(x)
     for elem in x:
@@ -95,21 +171,40 @@ def _duplicated(x, incomparables=None, from_last: bool = False):
     return np.array(out, dtype=bool)
 
 
+@duplicated.register(object, backend="numpy")
+def _duplicated(x, incomparables=None, from_last: bool = False):
+    if incomparables is None or incomparables is False:
+        incomparables = []
+    incomparables = make_array(incomparables)
+
+    x = make_array(x)
+    if x.ndim != 1 or x.dtype.kind == "O":
+        return _duplicated_obj(x, incomparables, from_last)
+
+    if from_last:
+        x = x[::-1]
+    out = ~_first_mask(x)
+
+    if incomparables.size > 0:
+        out[np.isin(x, incomparables)] = False
+        if is_null(incomparables).any():
+            out[is_null(x)] = False
+
+    return out[::-1] if from_last else out
+
+
 @intersect.register(object, backend="numpy")
 def _intersect(x, y):
-    out, idx, _ = np.intersect1d(x, y, return_indices=True)
-    return out[np.argsort(idx)]
+    x = _unique(x)
+    return x[_in_unique(x, make_array(y).ravel())]
 
 
 @setdiff.register(object, backend="numpy")
 def _setdiff(x, y):
-    x = make_array(x)
-    out = x[~np.isin(x, y)]
-    return unique(
-        out,
-        __backend="numpy",  # type: ignore
-        __ast_fallback="normal",  # type: ignore
-    )
+    x = _unique(x)
+    if isinstance(y, MatchIndex):
+        return x[~y.lookup(x)[1]]
+    return x[~_in_unique(x, make_array(y).ravel())]
 
 
 @setequal.register(object, backend="numpy")
@@ -119,15 +214,13 @@ def _setequal(x, y):
 
 @unique.register(object, backend="numpy")
 def _unique(x):
-    out, idx = np.unique(x, return_index=True)
-    return out[np.argsort(idx)]
+    x = make_array(x).ravel()
+    return x[_first_mask(x)]
 
 
 @union.register(object, backend="numpy")
 def _union(x, y):
-    out = np.concatenate([make_array(x), make_array(y)])
-    out, idx = np.unique(out, return_index=True)
-    return out[np.argsort(idx)]
+    return _unique(np.concatenate([make_array(x), make_array(y)]))
 
 
 @head.register(object, backend="numpy")
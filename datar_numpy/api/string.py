@@ -1,4 +1,6 @@
 import re
+import sys
+from functools import lru_cache
 
 import numpy as np
 from datar.core.utils import logger
@@ -23,7 +25,27 @@ from datar.apis.base import (
     nchar,
     nzchar,
 )
-from ..utils import is_null, is_scalar, make_array
+from ..utils import (
+    RaggedArray,
+    is_null,
+    is_scalar,
+    make_array,
+    pattern_cache,
+)
+
+# Characters that make a pattern a real regex instead of a literal string
+_REGEX_SPECIALS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+# Digit values of the ASCII code points for strtoi(), 99 for non-digits
+_DIGIT_VALUES = np.full(128, 99, dtype=np.int64)
+_DIGIT_VALUES[48:58] = np.arange(10)
+_DIGIT_VALUES[65:91] = _DIGIT_VALUES[97:123] = np.arange(10, 36)
+# The base prefixes of strtoi(), keyed by the lowercased code point
+_BASE_PREFIXES = {ord("b"): 2, ord("o"): 8, ord("x"): 16}
+# A %-conversion of a format string, without the mapping key
+_SPRINTF_SPEC = re.compile(
+    r"%(?P<flags>[-#0 +]*)(?P<width>\d*)(?:\.(?P<prec>\d+))?[hlL]?"
+    r"(?P<conv>[diouxXeEfFgGcrsa%])"
+)
 
 
 def _warn_more_pat_or_rep(pattern, fun, arg="pattern"):
@@ -43,20 +65,69 @@ def _warn_more_pat_or_rep(pattern, fun, arg="pattern"):
     return pattern[0]
 
 
-def _match(text, pattern, ignore_case, invert, fixed):
-    """Do the regex match"""
-    if is_null(text):
-        return False
-
+def _compile(pattern, ignore_case=False, fixed=False):
+    """Compile the pattern, using the shared pattern cache"""
     flags = re.IGNORECASE if ignore_case else 0
-    if fixed:
-        pattern = re.escape(pattern)
+    return pattern_cache.get(pattern, flags, fixed)
+
+
+def _match(pattern, x, ignore_case, fixed, invert):
+    """Match the pattern against all elements in x in bulk
+
+    Literal patterns are looked up with `np.strings.find()`, real regexes
+    are searched with a single compiled pattern over the non-NA elements.
+    NA elements never match, even when `invert` is True.
+    """
+    x = make_array(x)
+    if x.dtype.kind == "U":
+        notna = None
+        values = x
+    else:
+        notna = ~is_null(x)
+        values = x[notna]
+        if values.dtype.kind != "O":
+            values = values.astype(str)
+
+    if not ignore_case and (fixed or not _REGEX_SPECIALS.search(pattern)):
+        matched = np.strings.find(values.astype(str), pattern) >= 0
+    else:
+        search = _compile(pattern, ignore_case, fixed).search
+        matched = np.fromiter(
+            (search(elem) is not None for elem in values.ravel().tolist()),
+            dtype=bool,
+            count=values.size,
+        ).reshape(values.shape)
 
-    pattern = re.compile(pattern, flags)
-    matched = pattern.search(text)
     if invert:
-        matched = not bool(matched)
-    return bool(matched)
+        matched = ~matched
+    if notna is None:
+        return matched
+
+    out = np.zeros(x.shape, dtype=bool)
+    out[notna] = matched
+    return out
+
+
+def _map_notna(x, fun):
+    """Apply a bulk string function to the non-NA elements of x
+
+    Unicode arrays are passed to `fun` as a whole. For other arrays, only
+    the non-NA elements are converted to unicode and passed, and the NAs
+    are kept in an object array.
+    """
+    scalar = is_scalar(x)
+    x = make_array(x)
+    if x.dtype.kind == "U":
+        out = fun(x)
+    else:
+        notna = ~is_null(x)
+        if notna.all():
+            out = fun(x.astype(str))
+        else:
+            out = x.astype(object)
+            out[notna] = fun(x[notna].astype(str))
+
+    return out[0] if scalar else out
 
 
 def _sub_(
@@ -73,21 +144,60 @@ def _sub_(
     """
     pattern = _warn_more_pat_or_rep(pattern, fun)
     replacement = _warn_more_pat_or_rep(replacement, fun, "replacement")
-    if fixed:
-        pattern = re.escape(pattern)
+    if fixed and not ignore_case:
+        return _map_notna(
+            x,
+            lambda values: np.strings.replace(
+                values,
+                pattern,
+                replacement,
+                count or -1,
+            ),
+        )
+
+    pattern = _compile(pattern, ignore_case, fixed)
+    return _sub_elem(pattern, replacement, x, count)
 
-    flags = re.IGNORECASE if ignore_case else 0
-    pattern = re.compile(pattern, flags)
 
+def _sub_elem(pattern, replacement, x, count):
+    """Replace a compiled pattern in a single element"""
     return pattern.sub(repl=replacement, count=count, string=x)
 
 
-def _paste_(args, sep: str = " ") -> object:
-    """Join strings with a separator"""
-    isnull = is_null(args)
-    if np.any(isnull):
-        return np.nan
-    return sep.join((str(a) for a in args)) if len(args) > 0 else sep
+def _paste_(args, sep: str = " "):
+    """Join the columns element-wise with a separator
+
+    Each column is cast to unicode once and the NA masks of all columns
+    are combined, so that the rows with any NA end up NA.
+    """
+    out = None
+    na_mask = None
+    for arg in args:
+        col = make_array(arg)
+        if col.dtype.kind != "U":
+            mask = is_null(col)
+            if mask.any():
+                col = np.where(mask, "", col)
+                na_mask = mask if na_mask is None else na_mask | mask
+            col = col.astype(str)
+
+        if out is None:
+            out = col
+        else:
+            if sep:
+                out = np.strings.add(out, sep)
+            out = np.strings.add(out, col)
+
+    if out is None:
+        return np.array([], dtype=str)
+
+    if na_mask is None or not na_mask.any():
+        return out
+
+    out, na_mask = np.broadcast_arrays(out, na_mask)
+    out = out.astype(object)
+    out[na_mask] = np.nan
+    return out
 
 
 def _prepare_nchar(x, type_, keep_na):
@@ -98,49 +208,70 @@ def _prepare_nchar(x, type_, keep_na):
             f"got {type_}"
         )
     if keep_na is None:
-        keep_na = type != "width"
+        keep_na = type_ != "width"
 
     return x, keep_na
 
 
-@np.vectorize
-def _nchar_(x, retn, allow_na, keep_na, na_len):
-    """Get the size of a scalar string"""
-    if is_null(x):
-        return np.nan if keep_na else na_len
-
-    if retn == "width":
-        try:
-            from wcwidth import wcswidth
-        except ImportError as imperr:  # pragma: no cover
-            raise ImportError(
-                "`nchar(x, type='width')` requires `wcwidth` package.\n"
-                "Try: pip install -U wcwidth"
-            ) from imperr
-
-        return wcswidth(x)
-    if retn == "chars":
-        return len(x)
-
-    if isinstance(x, (np.bytes_, np.str_)):
-        x = x.item()
-    if isinstance(x, bytes):
-        return len(x)
-
+def _get_wcswidth():
+    """Import wcswidth from wcwidth"""
     try:
-        x = x.encode("utf-8")
-    except UnicodeEncodeError:  # pragma: no cover
-        if allow_na:
-            return np.nan
-        raise
-    return len(x)
-
-
-_paste_ = np.vectorize(
-    _paste_, [object], excluded={"sep"}, signature="(n)->()"
+        from wcwidth import wcswidth
+    except ImportError as imperr:  # pragma: no cover
+        raise ImportError(
+            "`nchar(x, type='width')` requires `wcwidth` package.\n"
+            "Try: pip install -U wcwidth"
+        ) from imperr
+    return wcswidth
+
+
+def _nchar_(x, retn, allow_na):
+    """Get the sizes of the strings of a unicode array in bulk, on the
+    code points of the strings. Returns a float array if there are
+    unencodable strings for bytes with allow_na."""
+    lens = np.strings.str_len(x)
+    if retn == "chars" or x.size == 0 or x.itemsize == 0:
+        return lens
+
+    # zero-copy view of the UCS4 code points, padded with zeros
+    codes = x.reshape(-1).view(np.uint32).reshape(x.size, -1)
+    if retn == "bytes":
+        # utf-8 bytes of each code point, the paddings counted as 1 each
+        out = (
+            1
+            + (codes >= 0x80)
+            + (codes >= 0x800)
+            + (codes >= 0x10000)
+        ).sum(axis=1) - (codes.shape[1] - lens.ravel())
+        surrogates = ((codes >= 0xD800) & (codes <= 0xDFFF)).any(axis=1)
+        if surrogates.any():
+            if not allow_na:
+                raise UnicodeEncodeError(
+                    "utf-8",
+                    str(x.ravel()[surrogates][0]),
+                    0,
+                    1,
+                    "surrogates not allowed",
+                )
+            out = out.astype(float)
+            out[surrogates] = np.nan
+        return out.reshape(x.shape)
+
+    # width: ASCII strings in bulk, -1 with control characters as wcswidth
+    ascii_ = (codes < 0x80).all(axis=1)
+    out = ((codes >= 0x20) & (codes < 0x7F)).sum(axis=1)
+    control = (((codes > 0) & (codes < 0x20)) | (codes == 0x7F)).any(axis=1)
+    out[control] = -1
+    if not ascii_.all():
+        wcswidth = _get_wcswidth()
+        others = np.flatnonzero(~ascii_)
+        out[others] = [wcswidth(elem) for elem in x.ravel()[others].tolist()]
+    return out.reshape(x.shape)
+
+
+_sub_elem = np.vectorize(
+    _sub_elem, excluded={"pattern", "replacement", "count"}
 )
-_match = np.vectorize(_match, excluded={"pattern"})
-_sub_ = np.vectorize(_sub_, excluded={"pattern", "replacement"})
 
 
 @grep.register(object, backend="numpy")
@@ -153,13 +284,7 @@ def _grep(
     invert=False,
 ):
     pattern = _warn_more_pat_or_rep(pattern, "grepl")
-    matched = _match(
-        x,
-        pattern,
-        ignore_case=ignore_case,
-        invert=invert,
-        fixed=fixed,
-    )
+    matched = _match(pattern, x, ignore_case, fixed, invert)
     x = make_array(x)
     return x[matched] if value else np.flatnonzero(matched)
 
@@ -173,13 +298,8 @@ def _grepl(
     invert=False,
 ):
     pattern = _warn_more_pat_or_rep(pattern, "grepl")
-    return _match(
-        x,
-        pattern,
-        ignore_case=ignore_case,
-        invert=invert,
-        fixed=fixed,
-    )
+    out = _match(pattern, x, ignore_case, fixed, invert)
+    return out[0] if is_scalar(x) else out
 
 
 @sub.register(object, backend="numpy")
@@ -206,23 +326,53 @@ def _gsub(
 
 @strsplit.register(object, backend="numpy")
 def _strsplit(x, split, fixed=False):
-    def split_str(string, sep):
-        if fixed:
-            return string.split(sep)
-
-        sep = re.compile(sep)
-        return sep.split(string)
-
-    if is_scalar(x) and is_scalar(split):
-        return np.array([split_str(x, split)], dtype=object)
-    return np.vectorize(split_str, [object])(x, split)
+    x = make_array(x).ravel()
+    if is_scalar(split):
+        # compile once for all elements
+        splitters = [split if fixed else _compile(split)] * x.size
+    else:
+        x, split = np.broadcast_arrays(x, make_array(split).ravel())
+        split = split.tolist()
+        splitters = split if fixed else [_compile(sep) for sep in split]
+    notna = ~is_null(x)
+
+    values = []
+    lens = np.ones(x.size, dtype=np.int64)
+    if fixed and is_scalar(split) and len(split) == 1:
+        # a single character can't span the joints of the strings,
+        # so all of them can be split at once
+        notna_strs = x[notna].astype(str)
+        lens[notna] = np.strings.count(notna_strs, split) + 1
+        if notna_strs.size > 0:
+            values = split.join(notna_strs.tolist()).split(split)
+    else:
+        strings = x.tolist()
+        for i in np.flatnonzero(notna).tolist():
+            sep = splitters[i]
+            parts = strings[i].split(sep) if fixed else sep.split(strings[i])
+            lens[i] = len(parts)
+            values.extend(parts)
+
+    offsets = np.zeros(x.size + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    if notna.all():
+        return RaggedArray(np.array(values, dtype=str), offsets)
+
+    # NAs are kept as a single NA in the rows
+    out = np.full(offsets[-1], np.nan, dtype=object)
+    out[~np.repeat(~notna, lens)] = values
+    return RaggedArray(out, offsets)
 
 
 @paste.register(object, backend="numpy")
 def _paste(*args, sep=" ", collapse=None):
-    args = (arg for arg in args if is_scalar(arg) or len(arg) > 0)
-    pasted = _paste_(np.array(np.broadcast_arrays(*args)).T, sep=sep)
-    return pasted if collapse is None else collapse.join(pasted)
+    args = [arg for arg in args if is_scalar(arg) or len(arg) > 0]
+    pasted = _paste_(args, sep=sep)
+    if collapse is not None:
+        return collapse.join(pasted.tolist())
+    if args and all(is_scalar(arg) for arg in args):
+        return pasted.reshape(())
+    return pasted
 
 
 @paste0.register(object, backend="numpy")
@@ -236,15 +386,140 @@ def _paste0(*args, collapse=None):
     )
 
 
+@lru_cache(maxsize=128)
+def _parse_fmt(fmt):
+    """Split a format string into literals and conversion specs
+
+    Returns a list of (literal, spec) pairs, with spec as a match or None
+    for the trailing literal. None is returned for the formats that can't
+    be applied column-wise (mapping keys, `*` width or precision, and
+    `%r`/`%a` that would show the reprs of numpy scalars).
+    """
+    pieces = []
+    pos = literal_start = 0
+    literal = ""
+    while True:
+        pos = fmt.find("%", pos)
+        if pos < 0:
+            break
+        spec = _SPRINTF_SPEC.match(fmt, pos)
+        if spec is None or spec["conv"] in "ra":
+            return None
+        literal += fmt[literal_start:pos]
+        pos = literal_start = spec.end()
+        if spec["conv"] == "%":
+            if spec.group() != "%%":
+                return None
+            literal += "%"
+        else:
+            pieces.append((literal, spec))
+            literal = ""
+
+    pieces.append((literal + fmt[literal_start:], None))
+    return pieces
+
+
+def _format_column(spec, col):
+    """Apply a single conversion to a column in bulk"""
+    flags, width, prec, conv = spec.group("flags", "width", "prec", "conv")
+    col = np.asarray(col)
+    kind = col.dtype.kind
+    if prec is None and flags in ("", "-", "0") and (
+        (conv == "s" and kind in "UiuO")
+        or (conv in "di" and kind in "iu")
+    ):
+        out = col.astype(str)
+        if not width:
+            return out
+        width = int(width)
+        if flags == "-":
+            return np.strings.ljust(out, width)
+        if flags == "0" and conv != "s":
+            return np.strings.zfill(out, width)
+        return np.strings.rjust(out, width)
+
+    # python formatting, but without building a tuple of all args per row
+    spec = spec.group()
+    return np.array(
+        [spec % (elem,) for elem in col.ravel().tolist()], dtype=str
+    ).reshape(col.shape)
+
+
 @sprintf.register(object, backend="numpy")
 def _sprintf(fmt, *args):
-    return np.vectorize(lambda fmt, *args: fmt % args)(
-        *np.broadcast_arrays(fmt, *args)
-    )
+    pieces = _parse_fmt(fmt) if isinstance(fmt, str) else None
+    if pieces is None or len(pieces) != len(args) + 1:
+        return np.vectorize(lambda fmt, *args: fmt % args)(
+            *np.broadcast_arrays(fmt, *args)
+        )
+
+    # format string parsed once, conversions applied column by column
+    out = np.broadcast_to(np.str_(pieces[0][0]), np.broadcast_shapes(
+        *(np.shape(arg) for arg in args)
+    ))
+    for (_, spec), (literal, _), arg in zip(pieces, pieces[1:], args):
+        out = np.strings.add(out, _format_column(spec, arg))
+        if literal:
+            out = np.strings.add(out, literal)
+    return out
+
+
+def _slice_strs(x, start, stop):
+    """Slice the unicode strings in bulk, like `x[start:stop]` element-wise
+
+    The strings are sliced on the code-point matrix of the buffer. For
+    non-negative scalar bounds this is a column range, otherwise the bounds
+    are normalized per string and the code points are gathered.
+    Returns None when the bulk path doesn't apply.
+    """
+    x = np.asarray(x)
+    start = np.asarray(start)
+    stop = np.asarray(sys.maxsize if stop is None else stop)
+    if (
+        x.dtype.kind != "U"
+        or start.dtype.kind not in "iu"
+        or stop.dtype.kind not in "iu"
+    ):
+        return None
+
+    shape = np.broadcast_shapes(x.shape, start.shape, stop.shape)
+    width = x.dtype.itemsize // 4
+    x = np.ascontiguousarray(np.broadcast_to(x, shape)).reshape(-1)
+    codes = x.view(np.uint32).reshape(-1, width)
+    if start.ndim == 0 and stop.ndim == 0 and start >= 0 and stop >= 0:
+        # a copy, the range may well be the whole buffer of x
+        out = codes[:, start:stop].copy()
+    else:
+        lengths = np.strings.str_len(x)
+        start = np.broadcast_to(start, shape).reshape(-1)
+        stop = np.broadcast_to(stop, shape).reshape(-1)
+        start = np.where(
+            start < 0, np.maximum(start + lengths, 0), np.minimum(start, lengths)
+        )
+        stop = np.where(
+            stop < 0, np.maximum(stop + lengths, 0), np.minimum(stop, lengths)
+        )
+        sizes = np.maximum(stop - start, 0)
+        cols = np.arange(sizes.max(initial=0))
+        index = np.minimum(start[:, None] + cols, width - 1)
+        out = np.where(
+            cols < sizes[:, None],
+            np.take_along_axis(codes, index, axis=1),
+            0,
+        )
+
+    if out.shape[1] == 0:
+        return np.zeros(shape, dtype="<U1")
+    out = np.ascontiguousarray(out, dtype=np.uint32)
+    return out.view(f"<U{out.shape[1]}").reshape(shape)
 
 
 @substr.register(object, backend="numpy")
 def _substr(x, start, stop):
+    out = _slice_strs(x, start, stop)
+    if out is not None:
+        return out
+
     return np.vectorize(lambda x, start, stop: x[start:stop])(
         *np.broadcast_arrays(x, start, stop)
     )
@@ -252,6 +527,10 @@ def _substr(x, start, stop):
 
 @substring.register(object, backend="numpy")
 def _substring(x, first, last=None):
+    out = _slice_strs(x, first, last)
+    if out is not None:
+        return out
+
     if last is None:
         return np.vectorize(lambda x, first: x[first:])(
             *np.broadcast_arrays(x, first)
@@ -274,9 +553,108 @@ def _endswith(x, suffix):
     return np.char.endswith(x, suffix)
 
 
+def _int_or_na(x, base):
+    """Parse a single string with int(), NA if invalid or overflowing"""
+    try:
+        out = int(x, base)
+    except ValueError:
+        return None
+    return out if -(2**63) <= out < 2**63 else None
+
+
+def _strtoi_(x, base):
+    """Parse the unicode strings as integers in bulk
+
+    The code points are validated against a digit lookup table and
+    accumulated column by column in int64 (Horner's method). The strings
+    that the bulk parser can't take (or that may overflow int64) are
+    left to `int()`. With base 0, the base is taken from the prefix (0x,
+    0o, 0b), and a leading 0 otherwise means octal, like R's `strtoi()`.
+    Returns the integers and the mask of the invalid ones.
+    """
+    x = np.ascontiguousarray(np.strings.strip(x))
+    width = x.dtype.itemsize // 4
+    size = x.size
+    codes = np.zeros((size, width + 2), dtype=np.uint32)
+    codes[:, :width] = x.view(np.uint32).reshape(size, width)
+    lengths = np.strings.str_len(x)
+    rows = np.arange(size)
+
+    # sign
+    first = codes[:, 0]
+    neg = first == ord("-")
+    start = (neg | (first == ord("+"))).astype(np.intp)
+
+    # prefix
+    bases = np.full(size, base, dtype=np.int64)
+    prefix = codes[rows, start + 1] | 0x20
+    has_prefix = (codes[rows, start] == ord("0")) & (lengths > start + 1)
+    for code, prefix_base in _BASE_PREFIXES.items():
+        matched = has_prefix & (prefix == code)
+        if base == 0:
+            bases[matched] = prefix_base
+        elif base != prefix_base:
+            continue
+        start[matched] += 2
+    # like strtol(), a leading 0 means octal with base 0
+    octal = (
+        (bases == 0)
+        & (codes[rows, start] == ord("0"))
+        & (lengths > start + 1)
+    )
+    bases[octal] = 8
+    bases[bases == 0] = 10
+
+    cols = np.arange(width)
+    in_num = (cols >= start[:, None]) & (cols < lengths[:, None])
+    digits = _DIGIT_VALUES[np.minimum(codes[:, :width], 127)]
+    digits[codes[:, :width] > 127] = 99
+    ndigits = lengths - start
+    # the largest number of digits that never overflows int64
+    max_digits = np.floor(63 / np.log2(bases)).astype(np.int64)
+    valid = (
+        (ndigits > 0)
+        & (ndigits <= max_digits)
+        & ~(in_num & (digits >= bases[:, None])).any(axis=1)
+    )
+
+    out = np.zeros(size, dtype=np.int64)
+    for col in range(width):
+        out = np.where(in_num[:, col], out * bases + digits[:, col], out)
+    out[neg] = -out[neg]
+
+    invalid = np.zeros(size, dtype=bool)
+    for i in np.flatnonzero(~valid):
+        parsed = _int_or_na(x[i], 8 if octal[i] else base)
+        if parsed is None:
+            invalid[i] = True
+        else:
+            out[i] = parsed
+    return out, invalid
+
+
 @strtoi.register(object, backend="numpy")
 def _strtoi(x, base=0):
-    return np.vectorize(int, excluded={"base"})(x, base=base)
+    if base != 0 and not 2 <= base <= 36:
+        raise ValueError(
+            f"In strtoi(...), `base` must be 0 or in [2, 36], got {base}."
+        )
+
+    scalar = is_scalar(x)
+    x = make_array(x)
+    na = is_null(x)
+    values = x[~na]
+    if values.dtype.kind != "U":
+        values = values.astype(str)
+
+    parsed, invalid = _strtoi_(values, base)
+    na[~na] = invalid
+    if na.any():
+        out = np.full(x.shape, np.nan)
+        out[~na] = parsed[~invalid]
+    else:
+        out = parsed.reshape(x.shape)
+    return out[0] if scalar else out
 
 
 @trimws.register(object, backend="numpy")
@@ -303,16 +681,35 @@ def _tolower(x):
     return np.char.lower(x)
 
 
+@lru_cache(maxsize=128)
+def _chartr_table(old, new):
+    """The code points to translate from and to, for chartr()"""
+    table = dict(zip(map(ord, old), map(ord, new)))
+    return (
+        np.fromiter(table.keys(), dtype=np.uint32, count=len(table)),
+        np.fromiter(table.values(), dtype=np.uint32, count=len(table)),
+    )
+
+
 @chartr.register(object, backend="numpy")
 def _chartr(old, new, x):
-    x = make_array(x, dtype=str)
     old = _warn_more_pat_or_rep(old, "chartr", "old")
     new = _warn_more_pat_or_rep(new, "chartr", "new")
+    keys, values = _chartr_table(old, new)
+    if keys.size == 0:
+        return _map_notna(x, lambda strs: strs)
+
+    # lookup table of the code points, identity except the keys
+    lut = np.arange(keys.max() + 1, dtype=np.uint32)
+    lut[keys] = values
+
+    def translate(strs):
+        codes = np.ascontiguousarray(strs).view(np.uint32).copy()
+        mask = codes < lut.size
+        codes[mask] = lut[codes[mask]]
+        return codes.view(strs.dtype).reshape(strs.shape)
 
-    new = new[: len(old)]
-    for oldc, newc in zip(old, new):
-        x = np.char.replace(x, oldc, newc)
-    return x
+    return _map_notna(x, translate)
 
 
 @nchar.register(object, backend="numpy")
@@ -324,13 +721,24 @@ def _nchar(
     _na_len: int = 2,
 ):
     x, keep_na = _prepare_nchar(x, type_, keep_na)
-    return _nchar_(
-        x,
-        retn=type_,
-        allow_na=allow_na,
-        keep_na=keep_na,
-        na_len=_na_len,
-    )
+    scalar = is_scalar(x)
+    x = make_array(x)
+    if x.dtype.kind == "S":
+        out = np.strings.str_len(x)
+    elif x.dtype.kind == "U":
+        out = _nchar_(x, type_, allow_na)
+    else:
+        notna = ~is_null(x)
+        values = _nchar_(x[notna].astype(str), type_, allow_na)
+        if notna.all():
+            out = values
+        else:
+            out = np.full(x.shape, np.nan if keep_na else _na_len, float)
+            out[notna] = values
+            if not keep_na and values.dtype.kind != "f":
+                out = out.astype(values.dtype)
+
+    return out[0] if scalar else out
 
 
 @nzchar.register(object, backend="numpy")
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import re
 import warnings
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from functools import lru_cache
 from numbers import Number
 from typing import TYPE_CHECKING, Any
@@ -47,6 +48,28 @@ def is_scalar(x: Any) -> bool:
         return np.ndim(x) == 0  # type: ignore[arg-type]
 
 
+def _is_null_atomic(x: Any) -> bool:
+    """Is a single element None or NA?"""
+    return x is None or (isinstance(x, Number) and x != x)
+
+
+def _is_null_object(x: np.ndarray) -> npt.NDArray[np.bool_]:
+    """Find the NAs in an object array with bulk comparisons
+
+    NaN is the only value not equal to itself. Elements that can't be
+    compared as scalars (i.e. arrays) are checked one by one.
+    """
+    try:
+        out = np.not_equal(x, x)
+        out |= np.equal(x, None)
+    except (TypeError, ValueError):
+        return np.vectorize(_is_null_atomic, [bool])(x)
+
+    if out.dtype != np.bool_:  # pragma: no cover
+        return np.vectorize(_is_null_atomic, [bool])(x)
+    return out
+
+
 def is_null(x: Any) -> bool | npt.NDArray[np.bool_]:
     """Is x None or NA? Like pandas.isnull()
 
@@ -57,15 +80,33 @@ def is_null(x: Any) -> bool | npt.NDArray[np.bool_]:
         If x is scalar, return True if x is None or NA, False otherwise.
         If x is an array, return a boolean array with the same shape as x.
     """
+    if x is None:
+        return True
+    if isinstance(x, (str, bytes)):
+        return False
+    if isinstance(x, Number):
+        return x != x
 
-    try:
-        return np.isnan(x)
-    except TypeError:
+    if isinstance(x, np.ndarray):
+        arr = x
+    else:
+        arr = np.asarray(x)
+        if arr.dtype.kind in "US" and arr.ndim > 0:
+            # NAs are turned into strings by np.asarray()
+            arr = np.array(x, dtype=object)
 
-        isnull_atomic = (
-            lambda x: x is None or (isinstance(x, Number) and x != x)
-        )
-        return np.vectorize(isnull_atomic, [bool])(x)
+    kind = arr.dtype.kind
+    if kind in "fc":
+        out = np.isnan(arr)
+    elif kind in "mM":
+        out = np.isnat(arr)
+    elif kind == "O":
+        out = _is_null_object(arr)
+    else:
+        # integers, booleans, strings, bytes and void can't be NA
+        out = np.zeros(arr.shape, dtype=bool)
+
+    return out if arr.ndim > 0 else out[()]
 
 
 def make_array(x: Any, dtype: DTypeLike | None = None) -> np.ndarray:
@@ -80,20 +121,273 @@ def make_array(x: Any, dtype: DTypeLike | None = None) -> np.ndarray:
         warnings.simplefilter("ignore", VisibleDeprecationWarning)
         out = np.array(x, dtype=dtype)
 
-    if dtype is not None:
+    if dtype is not None or out.dtype.kind != "U":
         return out
 
     # Keep NAs with strings
     # np.array(["a", np.nan]) turns into ["a", "nan"]
     # but we want ["a", np.nan]
-    na_mask = is_null(x)
-    if (
-        isinstance(na_mask, np.ndarray)
-        and na_mask.any()
-        and out.dtype.kind == "U"
-    ):
-        out = np.array(x, dtype=object)
-    return out
+    # Only the "nan"s need to be checked against the original elements,
+    # and the elements are converted again only when there are NAs
+    candidates = np.flatnonzero(out == "nan")
+    if candidates.size == 0:
+        return out
+
+    if out.ndim == 1:
+        if not isinstance(x, (list, tuple)):
+            x = list(x)
+        if all(isinstance(x[i], str) for i in candidates):
+            return out
+
+    return np.array(x, dtype=object)
+
+
+class PatternCache:
+    """A size-bounded LRU cache of compiled regular expressions
+
+    Keyed on `(pattern, flags, fixed)`, so that a literal pattern and the
+    same text used as a regex don't share an entry.
+
+    Args:
+        maxsize: The maximum number of compiled patterns to keep
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self._cache: OrderedDict[tuple, re.Pattern] = OrderedDict()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        """The capacity of the cache"""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int) -> None:
+        if value < 0:
+            raise ValueError("`maxsize` must be non-negative")
+        self._maxsize = value
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _evict(self) -> None:
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+
+    def get(self, pattern: str, flags: int = 0, fixed: bool = False):
+        """Get the compiled pattern, compile it if not cached
+
+        Args:
+            pattern: The pattern
+            flags: The regex flags
+            fixed: Whether the pattern is a literal string
+
+        Returns:
+            The compiled pattern
+        """
+        key = (pattern, flags, fixed)
+        try:
+            compiled = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            compiled = re.compile(
+                re.escape(pattern) if fixed else pattern,
+                flags,
+            )
+            if self._maxsize > 0:
+                self._cache[key] = compiled
+                self._evict()
+            return compiled
+
+        self.hits += 1
+        self._cache.move_to_end(key)
+        return compiled
+
+    def clear(self) -> None:
+        """Clear the cache and reset the counters"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by all the regex functions
+pattern_cache = PatternCache()
+
+
+# Stands for all NAs when hashing values
+NA_KEY = object()
+
+
+class MatchIndex:
+    """A lookup index of a table, built once and reused by `match()`,
+    `is_element()` and `setdiff()` when passed as the table
+
+    Args:
+        table: The values to look up in
+    """
+
+    def __init__(self, table: Any) -> None:
+        self.table = make_array(table).ravel()
+        self._hashed: dict | None = None
+        if self.table.dtype.kind == "O":
+            self._sorter = self._sorted = None
+        else:
+            # stable, so that the first one of the duplicates is found
+            self._sorter = np.argsort(self.table, kind="stable")
+            self._sorted = self.table[self._sorter]
+
+    def __len__(self) -> int:
+        return self.table.size
+
+    @property
+    def hashed(self) -> dict:
+        """The positions of the first occurrences of the values"""
+        if self._hashed is None:
+            keys = self.table.tolist()
+            for i in np.flatnonzero(is_null(self.table)):
+                keys[i] = NA_KEY
+            n = len(keys)
+            self._hashed = dict(zip(reversed(keys), range(n - 1, -1, -1)))
+        return self._hashed
+
+    def lookup(
+        self,
+        x: Any,
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.bool_]]:
+        """Look up the elements of x in the table
+
+        Args:
+            x: The values to look up
+
+        Returns:
+            The positions of the first matches in the table (0 where not
+            found) and the mask of whether the elements are found, both
+            flattened.
+        """
+        x = make_array(x).ravel()
+        if self._sorted is None or x.dtype.kind == "O":
+            hashed = self.hashed
+            keys = x.tolist()
+            for i in np.flatnonzero(is_null(x)):
+                keys[i] = NA_KEY
+            pos = np.fromiter(
+                (hashed.get(key, -1) for key in keys),
+                dtype=np.intp,
+                count=len(keys),
+            )
+            found = pos >= 0
+            pos[~found] = 0
+            return pos, found
+
+        if self._sorted.size == 0:
+            return np.zeros(x.size, dtype=np.intp), np.zeros(x.size, bool)
+
+        # one searchsorted pass for both the positions and the membership
+        searched = np.searchsorted(self._sorted, x).clip(
+            max=self._sorted.size - 1
+        )
+        candidates = self._sorted[searched]
+        found = candidates == x
+        if x.dtype.kind in "fc" and self._sorted.dtype.kind in "fc":
+            found |= np.isnan(candidates) & np.isnan(x)
+        return self._sorter[searched], found
+
+
+def build_index(table: Any) -> MatchIndex:
+    """Build a lookup index of a table to be reused by `match()`,
+    `is_element()` and `setdiff()`
+
+    Args:
+        table: The values to look up in
+
+    Returns:
+        The lookup index
+    """
+    return MatchIndex(table)
+
+
+class RaggedArray:
+    """A compact ragged array, i.e. the result of `strsplit()`
+
+    The rows are stored as a flat array of values and an int64 array of
+    offsets, so that row `i` is `values[offsets[i]:offsets[i + 1]]`.
+
+    Args:
+        values: The flattened values of all rows
+        offsets: The offsets of the rows in values, one more than the
+            number of rows, starting with 0
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray) -> None:
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return self.offsets.size - 1
+
+    @property
+    def shape(self) -> tuple[int]:
+        return (len(self),)
+
+    def lengths(self) -> npt.NDArray[np.int64]:
+        """The lengths of the rows"""
+        return np.diff(self.offsets)
+
+    def __getitem__(self, item: Any) -> Any:
+        if isinstance(item, (int, np.integer)):
+            n = len(self)
+            if item < 0:
+                item += n
+            if not 0 <= item < n:
+                raise IndexError(
+                    f"index {item} is out of bounds for RaggedArray "
+                    f"with {n} rows"
+                )
+            return self.values[self.offsets[item]:self.offsets[item + 1]]
+
+        if isinstance(item, slice) and item.step in (None, 1):
+            start, stop, _ = item.indices(len(self))
+            offsets = self.offsets[start:max(start, stop) + 1]
+            return RaggedArray(
+                self.values[offsets[0]:offsets[-1]],
+                offsets - offsets[0],
+            )
+
+        # gather the rows
+        idx = np.arange(len(self))[item]
+        starts = self.offsets[idx]
+        lens = self.offsets[idx + 1] - starts
+        offsets = np.zeros(idx.size + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lens)
+        positions += np.arange(offsets[-1])
+        return RaggedArray(self.values[positions], offsets)
+
+    def __iter__(self):
+        values = self.values
+        offsets = self.offsets.tolist()
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            yield values[start:stop]
+
+    def tolist(self) -> list:
+        """Convert to a list of lists"""
+        values = self.values.tolist()
+        offsets = self.offsets.tolist()
+        return [
+            values[start:stop]
+            for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        out = np.empty(len(self), dtype=object)
+        out[:] = list(self)
+        return out if dtype is None else out.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"RaggedArray({self.tolist()!r})"
 
 
 def flatten_slice(x: slice) -> npt.NDArray[np.int_]:
@@ -169,6 +169,29 @@ def test_signif_0():
         signif(np.array(0))
 
 
+def test_signif_vectorized():
+    x = [12345.0, -0.0012345, 0, np.nan, np.inf, -np.inf, 5e-320]
+    assert_iterable_equal(
+        signif(x, 2),
+        [12000.0, -0.0012, 0, np.nan, np.inf, -np.inf, 5e-320],
+    )
+    assert_equal(signif(123456, 3), 123000.0)
+    assert_iterable_equal(signif([1.234, 12.34], [1, 3]), [1.0, 12.3])
+
+    out = np.empty(3)
+    res = signif([1.234, 5.678, 9.012], 2, out=out)
+    assert res is out
+    assert_iterable_equal(out, [1.2, 5.7, 9.0])
+    assert signif(np.array([1.234], dtype=np.float32), 2).dtype == np.float32
+    assert_iterable_equal(signif(1.2345, [1, 2, 3]), [1.0, 1.2, 1.23])
+    with pytest.raises(ValueError, match="shape"):
+        signif(1.2345, [1, 2, 3], out=np.empty(1))
+
+    x = np.array([123.456, 0.0012345, 98765.0])
+    assert signif(x, 3, out=x) is x
+    assert_iterable_equal(x, [123.0, 0.00123, 98800.0])
+
+
 def test_log():
     x = [1, 2, 3]
     assert_iterable_equal(
@@ -206,6 +229,31 @@ def test_weighted_mean():
     assert_equal(weighted_mean(x2, w2, na_rm=True), np.nan)
 
 
+def test_quantile_na_rm():
+    x = np.array([4.0, np.nan, 1.0, 3.0, np.nan, 2.0])
+    assert_iterable_equal(
+        quantile(x, [0, 0.5, 1], na_rm=True), [1.0, 2.5, 4.0]
+    )
+    assert_iterable_equal(x[[0, 2]], [4.0, 1.0])
+    assert_equal(median(x, na_rm=True), 2.5)
+    assert_equal(median(np.array([3, 1, 2]), na_rm=True), 2)
+    assert_equal(
+        median(np.array([3, None, 1, 2], dtype=object), na_rm=True), 2
+    )
+
+    allna = np.array([np.nan, np.nan])
+    assert_iterable_equal(quantile(allna, [0.5], na_rm=True), [np.nan])
+    assert np.isnan(quantile(allna, 0.5, na_rm=True))
+    assert np.isnan(median(allna, na_rm=True))
+    assert np.isnan(median(np.array([None], dtype=object), na_rm=True))
+
+    y = np.array([3.0, 1.0, 2.0])
+    assert_equal(median(y, overwrite_input=True), 2)
+    assert_iterable_equal(
+        quantile(y, [0.5], overwrite_input=True, type_=1), [2.0]
+    )
+
+
 def test_quantile():
     x = [1, 2, 3]
     assert_equal(quantile(x, 0.5), 2)
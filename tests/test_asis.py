@@ -25,6 +25,7 @@ from datar.base import (
     as_null,
     as_numeric,
 )
+from datar_numpy.utils import build_index
 from .utils import assert_equal, _isscalar, assert_iterable_equal
 
 
@@ -238,6 +239,23 @@ def test_is_element():
     )
 
 
+def test_is_element_index():
+    index = build_index([1, 2, 3])
+    assert_equal(is_element(1, index), True)
+    assert_equal(is_element(4, index), False)
+    assert_iterable_equal(is_element([1, 4], index), [True, False])
+
+    # the answer doesn't depend on how the table is passed
+    for x, y, expected in [
+        ([np.nan, 1.0], [np.nan, 2.0], [True, False]),
+        ([np.nan, 1.0], [1.0], [False, True]),
+        (["a", None], ["a", None], [True, True]),
+        ([None, "b"], ["a"], [False, False]),
+    ]:
+        assert_iterable_equal(is_element(x, y), expected)
+        assert_iterable_equal(is_element(x, build_index(y)), expected)
+
+
 def test_as_numeric_error():
     with pytest.raises(ValueError):
         as_numeric("a")
@@ -373,3 +391,111 @@ def test_as_date_error():
 
     out = as_date("1990-1-1", format="%Y", optional=True)
     assert np.isnan(out)
+
+
+def test_as_date_vectorized():
+    out = as_date(np.array([0, 1, 365]), origin="1970-01-01")
+    assert_iterable_equal(
+        out,
+        [
+            datetime.date(1970, 1, 1),
+            datetime.date(1970, 1, 2),
+            datetime.date(1971, 1, 1),
+        ],
+    )
+
+    x = np.array(["2020-01-01T23:00", "NaT"], dtype="datetime64[ns]")
+    out = as_date(x, dtype="datetime64[D]")
+    assert out.dtype == np.dtype("datetime64[D]")
+    assert_iterable_equal(out.astype(str), ["2020-01-01", "NaT"])
+    out = as_date(x, tz=1)
+    assert_iterable_equal(out, [datetime.date(2020, 1, 2), np.nan])
+    assert_equal(
+        as_date(np.datetime64("2020-01-01T23:00", "ns")),
+        datetime.date(2020, 1, 1),
+    )
+
+    x = ["2020-01-01", "2020/01/02", "2020-01-01", None, "bad"]
+    out = as_date(x, optional=True, dtype="datetime64[D]")
+    assert_iterable_equal(
+        out.astype(str),
+        ["2020-01-01", "2020-01-02", "2020-01-01", "NaT", "NaT"],
+    )
+    with pytest.raises(ValueError):
+        as_date(["2020-01-01", "bad"])
+
+    x = np.array([["2020-01-01", "2020-01-02"], ["2020-01-03", "bad"]])
+    out = as_date(x, optional=True, dtype="datetime64[D]")
+    assert out.shape == (2, 2)
+    assert_iterable_equal(
+        out.ravel().astype(str),
+        ["2020-01-01", "2020-01-02", "2020-01-03", "NaT"],
+    )
+
+    x = np.array([1, "2020-01-02", np.int64(3)], dtype=object)
+    out = as_date(x, origin="2000-01-01", dtype="datetime64[D]")
+    assert_iterable_equal(
+        out.astype(str), ["2000-01-02", "2020-01-02", "2000-01-04"]
+    )
+
+    out = as_date(
+        [datetime.date(2020, 1, 1), "2020-01-02", 1, None],
+        origin="2020-01-01",
+    )
+    assert_iterable_equal(
+        out,
+        [
+            datetime.date(2020, 1, 1),
+            datetime.date(2020, 1, 2),
+            datetime.date(2020, 1, 2),
+            np.nan,
+        ],
+    )
+    with pytest.raises(NotImplementedError):
+        as_date([1.1])
+
+
+def test_as_date_format_detection():
+    from datar_numpy.api.date import _FORMAT_CACHE
+
+    _FORMAT_CACHE.clear()
+    x = ["2020/01/02 10:00:00", "2020/01/03 23:59:59", None]
+    out = as_date(x, tz=1, dtype="datetime64[D]")
+    assert_iterable_equal(out.astype(str), ["2020-01-02", "2020-01-04", "NaT"])
+    assert list(_FORMAT_CACHE.values()) == ["%Y/%m/%d %H:%M:%S"]
+
+    # outliers are parsed one by one with all the formats
+    x = np.array(["2020-01-01", "2020-1-2", "2020/01/03", "2020-13-01"])
+    out = as_date(x, optional=True, dtype="datetime64[D]")
+    assert_iterable_equal(
+        out.astype(str), ["2020-01-01", "2020-01-02", "2020-01-03", "NaT"]
+    )
+
+    out = as_date(["01/02/2020", "12/31/2020"], try_formats=["%m/%d/%Y"])
+    assert_iterable_equal(
+        out, [datetime.date(2020, 1, 2), datetime.date(2020, 12, 31)]
+    )
+
+
+def test_as_date_iso_out_of_range(monkeypatch):
+    from datar_numpy.api import date
+
+    parsed = []
+    strptime = date._strptime
+
+    def _strptime(x, *args):
+        parsed.append(x)
+        return strptime(x, *args)
+
+    monkeypatch.setattr(date, "_strptime", _strptime)
+    x = ["2020-01-01"] * 10 + ["2020-02-29", "2020-02-30", "2021-02-29"]
+    out = as_date(x, optional=True, dtype="datetime64[D]")
+    assert_iterable_equal(
+        out.astype(str)[-3:], ["2020-02-29", "NaT", "NaT"]
+    )
+    # only the out-of-range values are left to strptime
+    assert sorted(parsed) == ["2020-02-30", "2021-02-29"]
+
+    x = ["2020-01-01 00:00:00"] * 10 + ["2020-01-01 24:00:00"]
+    out = as_date(x, optional=True, dtype="datetime64[D]")
+    assert_iterable_equal(out.astype(str)[-2:], ["2020-01-01", "NaT"])
@@ -9,6 +9,7 @@ from datar.base import (
     rcauchy,
     rchisq,
     rexp,
+    sample,
 )
 from .utils import assert_equal, assert_iterable_equal
 
@@ -38,3 +39,71 @@ def test_rand_generator():
     assert_equal(len(nums5), 2)
     assert_equal(len(nums6), 2)
     assert_equal(len(nums7), 2)
+
+
+def test_threads_reproducible():
+    set_seed(8525)
+    out1 = rnorm(1000, threads=4)
+    more1 = runif(3)
+    set_seed(8525)
+    out2 = rnorm(1000, threads=4)
+    more2 = runif(3)
+    assert_iterable_equal(out1, out2)
+    assert_iterable_equal(more1, more2)
+    # chunks get streams of their own
+    assert_equal(np.array_equal(out1[:250], out1[250:500]), False)
+
+    out = rnorm(1000, mean=np.arange(1000), sd=0, threads=3)
+    assert_iterable_equal(out, np.arange(1000))
+    assert rpois(100, 1, threads=2).dtype == np.int64
+
+
+def test_sample_follows_seed():
+    set_seed(1)
+    out1 = sample(range(100), 10)
+    set_seed(1)
+    out2 = sample(range(100), 10)
+    assert_iterable_equal(out1, out2)
+
+
+def test_out_and_dtype():
+    buf = np.empty(100, dtype=np.float32)
+    for fun, args in [
+        (rnorm, (1, 2)),
+        (runif, (1, 2)),
+        (rcauchy, ()),
+        (rchisq, (3,)),
+        (rexp, (2,)),
+    ]:
+        out = fun(100, *args, out=buf)
+        assert out is buf
+        assert fun(10, *args, dtype=np.float32).dtype == np.float32
+    assert ((buf >= 0) & np.isfinite(buf)).all()
+
+    ints = np.zeros(10, dtype=np.int32)
+    assert rpois(10, 3, out=ints) is ints
+    assert rbinom(10, 5, 0.5, dtype=np.int32).dtype == np.int32
+
+    set_seed(1)
+    out1 = runif(100, out=np.empty(100), threads=2)
+    set_seed(1)
+    assert_iterable_equal(runif(100, threads=2), out1)
+
+    with pytest.raises(ValueError, match="size"):
+        rnorm(5, out=buf)
+    with pytest.raises(ValueError, match="dtype"):
+        rnorm(100, out=buf, dtype=np.float64)
+
+
+def test_param_checks():
+    with pytest.raises(ValueError, match="sd"):
+        rnorm(3, sd=-1)
+    with pytest.raises(ValueError, match="sd"):
+        rnorm(3, sd=np.array([1, -1, 1]))
+    with pytest.raises(ValueError, match="scale"):
+        rcauchy(3, scale=-1)
+    with pytest.raises(ValueError, match="rate"):
+        rexp(3, rate=0)
+    with pytest.raises(ValueError, match="df"):
+        rchisq(3, df=0)
+    assert_iterable_equal(rnorm(2, mean=1, sd=0), [1, 1])
@@ -15,6 +15,7 @@ from datar.base import (
     seq_len,
     match,
 )
+from datar_numpy.utils import build_index
 from .utils import assert_equal, assert_iterable_equal
 
 
@@ -35,6 +36,20 @@ def test_rep():
     assert_iterable_equal(rep([1, 2], times=[1, 2]), [1, 2, 2])
 
 
+def test_rep_recycle():
+    assert_iterable_equal(rep([1, 2, 3], length=8), [1, 2, 3, 1, 2, 3, 1, 2])
+    assert_iterable_equal(
+        rep([1, 2], each=2, length=7), [1, 1, 2, 2, 1, 1, 2]
+    )
+    assert_iterable_equal(rep([1, 2], times=[2, 1], length=5), [1, 1, 2, 1, 1])
+    assert_iterable_equal(rep(["a", "b"], length=1), ["a"])
+    assert_equal(len(rep([1, 2], times=0)), 0)
+    assert_equal(len(rep([], length=3)), 0)
+    x = np.array([[1, 2], [3, 4]])
+    assert_iterable_equal(rep(x, 2), [1, 2, 3, 4, 1, 2, 3, 4])
+    assert_iterable_equal(rep(x, each=2, length=5), [1, 1, 2, 2, 3])
+
+
 def test_rep_errors(caplog):
     with caplog.at_level("WARNING"):
         rep(1, length=[1, 2])
@@ -85,6 +100,45 @@ def test_order():
     )
 
 
+def test_order_stable_multikey():
+    # ties keep their order, also when decreasing
+    assert_iterable_equal(order([1, 2, 1, 2], decreasing=True), [1, 3, 0, 2])
+    assert_iterable_equal(order(["b", None, "a", "b"]), [2, 0, 3, 1])
+    assert_iterable_equal(
+        order(["b", None, "a", "b"], decreasing=True, na_last=False),
+        [1, 0, 3, 2],
+    )
+    big = np.array([2**62, -(2**62), 2**62, 0])
+    assert_iterable_equal(order(big, decreasing=True), [0, 2, 3, 1])
+
+    keys = (np.array([1, 2, 1, 2, 1]), np.array(["a", "b", "c", "a", None]))
+    assert_iterable_equal(order(keys), [0, 2, 4, 3, 1])
+    assert_iterable_equal(order(keys, decreasing=[True, True]), [1, 3, 2, 0, 4])
+    assert_iterable_equal(
+        order(keys, decreasing=[False, True], na_last=False), [4, 2, 0, 1, 3]
+    )
+    with pytest.raises(ValueError):
+        order(keys, decreasing=[True])
+
+
+def test_order_top_k():
+    x = np.array([5, 1, 3, 1, 5, np.nan, 2])
+    for k in range(9):
+        for decreasing in (False, True):
+            for na_last in (False, True):
+                assert_iterable_equal(
+                    order(x, decreasing, na_last, k=k),
+                    order(x, decreasing, na_last)[:k],
+                )
+    assert_iterable_equal(order([3, 1, 2, 1], k=2), [1, 3])
+    assert_iterable_equal(order(["b", "a", "c"], decreasing=True, k=1), [2])
+
+    x = np.array([[3, np.nan], [1, 2]])
+    assert_iterable_equal(order(x), [2, 3, 0, 1])
+    assert_iterable_equal(order(x, k=2), [2, 3])
+    assert_iterable_equal(sort(x), [1, 2, 3, np.nan])
+
+
 def test_sort():
     assert_iterable_equal(sort([1, 2, 3]), [1, 2, 3])
     assert_iterable_equal(sort([3, 2, 1]), [1, 2, 3])
@@ -106,8 +160,30 @@ def test_rank():
     assert_iterable_equal(rank([1, 2, 2, 3], ties_method="min"), [1, 2, 2, 4])
     assert_iterable_equal(rank([1, 2, 2, 3], ties_method="max"), [1, 3, 3, 4])
 
-    with pytest.raises(NotImplementedError):
-        rank([1, 2, 2, 3], na_last=False)
+    x = [3, np.nan, 1, 3, None, 2, 3]
+    assert_iterable_equal(rank(x), [4, 6, 1, 4, 7, 2, 4])
+    assert_iterable_equal(rank(x, na_last=False), [6, 1, 3, 6, 2, 4, 6])
+    assert_iterable_equal(
+        rank(x, na_last="keep"), [4, np.nan, 1, 4, np.nan, 2, 4]
+    )
+    assert_iterable_equal(
+        rank(x, na_last="keep", ties_method="first"),
+        [3, np.nan, 1, 4, np.nan, 2, 5],
+    )
+    assert_iterable_equal(
+        rank(x, ties_method="last"), [5, 6, 1, 4, 7, 2, 3]
+    )
+    assert_iterable_equal(
+        rank(["b", "a", "b"], ties_method="min"), [2, 1, 2]
+    )
+    assert_iterable_equal(sorted(rank(x, ties_method="random")[[0, 3, 6]]), [
+        3, 4, 5
+    ])
+    assert_iterable_equal(rank([]), [])
+
+    assert_iterable_equal(rank(np.array([[2, 1], [1, 3]])), [3, 1.5, 1.5, 4])
+    with pytest.raises(ValueError):
+        rank([1, 2, 2, 3], ties_method="x")
 
 
 def test_rev():
@@ -126,7 +202,45 @@ def test_seq():
     assert_iterable_equal(seq(None, length_out=3), [1, 2, 3])
     assert_iterable_equal(seq(None, to=3), [1, 2, 3])
     assert_iterable_equal(seq(3), [1, 2, 3])
-    assert_iterable_equal(seq(1, 3, length_out=2), [1, 2])
+    assert_iterable_equal(seq(1, 3, length_out=2), [1, 3])
+    assert_iterable_equal(seq(1, 2, length_out=3), [1, 1.5, 2])
+
+
+def test_seq_r_semantics():
+    out = seq(1, 10, by=3)
+    assert out.dtype == np.int64
+    assert_iterable_equal(out, [1, 4, 7, 10])
+    assert_iterable_equal(seq(3, 1), [3, 2, 1])
+    assert_iterable_equal(seq(10, 1, by=-4), [10, 6, 2])
+    # floating point tolerance at the endpoint
+    assert_iterable_equal(seq(0, 1, by=0.1), np.arange(11) * 0.1)
+    assert_equal(len(seq(0, 0.3, by=0.1)), 4)
+    assert_iterable_equal(seq(5, length_out=3), [5, 6, 7])
+    assert_iterable_equal(seq(None, to=10, by=2, length_out=3), [6, 8, 10])
+    assert_iterable_equal(seq(None, length_out=3, by=2), [1, 3, 5])
+    assert_iterable_equal(seq(2, 2, by=0), [2])
+
+    out = seq(1, 2, by=0.5, dtype=np.float32)
+    assert out.dtype == np.float32
+    assert_iterable_equal(out, [1, 1.5, 2])
+    assert seq(1, 3, dtype=np.int32).dtype == np.int32
+    assert seq(None, length_out=3, dtype=np.int32).dtype == np.int32
+    assert_iterable_equal(seq(None, length_out=3, by=0.5), [1, 1.5, 2])
+    # clamped to `to` like R
+    assert seq(0, 0.7, by=0.1)[-1] == 0.7
+    assert seq(0.7, 0, by=-0.1)[-1] == 0
+    assert seq(np.int32(1), np.int32(5)).dtype == np.int32
+    assert seq(np.int32(1), 10, by=3).dtype == np.int32
+    out = seq(1, 10, length_out=4, dtype=np.int32)
+    assert out.dtype == np.int32
+    assert_iterable_equal(out, [1, 4, 7, 10])
+
+    with pytest.raises(ValueError, match="wrong sign"):
+        seq(1, 3, by=-1)
+    with pytest.raises(ValueError, match="invalid"):
+        seq(1, 3, by=0)
+    with pytest.raises(ValueError, match="too many"):
+        seq(1, 3, by=1, length_out=3)
 
 
 def test_seq_along():
@@ -142,3 +256,18 @@ def test_seq_len():
 def test_match():
     assert_iterable_equal(match([1, 2, 3], [2, 3, 4]), [-1, 0, 1])
     assert_iterable_equal(match([1, 2, 3], [2, 3, 4], nomatch=0), [0, 0, 1])
+
+
+def test_match_index():
+    index = build_index([3, 1, 3, np.nan, 2])
+    assert_iterable_equal(match([3, 2, 5, np.nan], index), [0, 4, -1, 3])
+    assert_iterable_equal(match(1, index, nomatch=0), [1])
+    assert_iterable_equal(match([1, 2], build_index([])), [-1, -1])
+
+    index = build_index(["a", None, 1, "a"])
+    assert_iterable_equal(match(["a", 1, np.nan, "b"], index), [0, 2, 1, -1])
+    assert_iterable_equal(match(["b", "a"], ["c", "a"]), [-1, 1])
+    assert_iterable_equal(
+        match(np.array(["a", None], dtype=object), build_index(["x", "a"])),
+        [1, -1],
+    )
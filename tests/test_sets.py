@@ -1,5 +1,5 @@
 import pytest
-# import numpy as np
+import numpy as np
 from datar.base import (
     all_,
     any_,
@@ -16,6 +16,7 @@ from datar.base import (
     head,
     tail,
 )
+from datar_numpy.utils import build_index
 from .utils import assert_iterable_equal, assert_equal
 
 
@@ -72,6 +73,32 @@ def test_duplicated():
     )
 
 
+def test_duplicated_vectorized():
+    assert_iterable_equal(
+        duplicated([1.0, np.nan, 2.0, np.nan, 1.0]),
+        [False, False, False, True, True],
+    )
+    assert_iterable_equal(
+        duplicated([1.0, np.nan, 2.0, np.nan, 1.0], from_last=True),
+        [True, True, False, False, False],
+    )
+    assert_iterable_equal(
+        duplicated([1.0, np.nan, np.nan], incomparables=[np.nan]),
+        [False, False, False],
+    )
+    assert_iterable_equal(
+        duplicated(["a", "b", "a", "c", "b"], incomparables=["b"]),
+        [False, False, True, False, False],
+    )
+    assert_iterable_equal(
+        duplicated([0, 1, 0], incomparables=False), [False, False, True]
+    )
+    assert_iterable_equal(
+        duplicated(["a", None, 1, None, np.nan, "a"]),
+        [False, False, False, True, True, True],
+    )
+
+
 def test_intersect():
     assert_iterable_equal(intersect([1, 2, 3], [3, 4, 5]), [3])
 
@@ -80,6 +107,11 @@ def test_setdiff():
     assert_iterable_equal(setdiff([1, 2, 3], [3, 4, 5]), [1, 2])
 
 
+def test_setdiff_index():
+    index = build_index([3, 4, 5])
+    assert_iterable_equal(setdiff([1, 2, 3, 1], index), [1, 2])
+
+
 def test_setequal():
     assert_equal(setequal([1, 2, 3], [3, 4, 5]), False)
     assert_equal(setequal([1, 2, 3], [3, 2, 1]), True)
@@ -94,6 +126,36 @@ def test_union():
     assert_iterable_equal(union([1, 2, 3], [3, 4, 5]), [1, 2, 3, 4, 5])
 
 
+def test_unique_keeps_order():
+    assert_iterable_equal(unique([3, 1, 3, 2, 1]), [3, 1, 2])
+    # wide range of integers
+    assert_iterable_equal(unique([10**12, 1, 10**12, -5]), [10**12, 1, -5])
+    assert_iterable_equal(unique(np.array([3, 1, 3], dtype=np.int8)), [3, 1])
+    assert_iterable_equal(unique([True, False, True]), [True, False])
+    assert_iterable_equal(
+        unique([2.5, np.nan, 1.0, np.nan, 2.5]), [2.5, np.nan, 1.0]
+    )
+    assert_iterable_equal(unique(["b", "a", "b"]), ["b", "a"])
+    assert_iterable_equal(
+        unique(["b", None, 1, "b", np.nan, 1]), ["b", None, 1]
+    )
+    assert_iterable_equal(
+        unique(np.array(["2020-01-02", "NaT", "2020-01-01", "NaT"],
+                        dtype="datetime64[D]")).astype(str),
+        ["2020-01-02", "NaT", "2020-01-01"],
+    )
+    assert_equal(len(unique([])), 0)
+
+
+def test_set_ops_keep_order():
+    assert_iterable_equal(intersect([5, 3, 1, 3], [1, 3, 9]), [3, 1])
+    assert_iterable_equal(setdiff([5, 3, 1, 5], [1]), [5, 3])
+    assert_iterable_equal(union(["b", "a"], ["c", "a"]), ["b", "a", "c"])
+    assert_iterable_equal(
+        intersect([np.nan, 1.0], [2.0, np.nan]), [np.nan]
+    )
+
+
 def test_head():
     assert_iterable_equal(head([1, 2, 3, 4, 5, 6, 7]), [1, 2, 3, 4, 5, 6])
     assert_iterable_equal(head([1, 2, 3, 4, 5], 2), [1, 2])
@@ -20,7 +20,9 @@ from datar.base import (
     chartr,
     nchar,
     nzchar,
+    lengths,
 )
+from datar_numpy.utils import pattern_cache
 from .utils import assert_equal, assert_iterable_equal
 
 
@@ -60,12 +62,53 @@ def test_grepl():
     )
 
 
+def test_regex_compiled_once_per_call():
+    pattern_cache.clear()
+    grepl(r"x\d+", ["x1", "y", "x22", "z"])
+    sub(r"x\d+", "-", ["x1", "y", "x22", "z"])
+    gsub(r"x\d+", "-", ["x1", "y", "x22", "z"])
+    strsplit(["x1ax2", "b"], r"x\d+")
+    assert_equal(pattern_cache.misses, 1)
+    assert_equal(pattern_cache.hits, 3)
+
+
+def test_grepl_na():
+    x = ["ab", None, "cb", np.nan]
+    assert_iterable_equal(grepl("b", x), [True, False, True, False])
+    assert_iterable_equal(grepl("^a", x), [True, False, False, False])
+    assert_iterable_equal(
+        grepl("b", x, invert=True), [False, False, False, False]
+    )
+    assert_iterable_equal(
+        grepl("A", x, ignore_case=True), [True, False, False, False]
+    )
+    assert_iterable_equal(grep("c", x), [2])
+    assert_iterable_equal(grepl("1", [1, 2, 11]), [True, False, True])
+    assert_equal(grepl("b", "abc"), True)
+
+
 def test_sub():
     assert_equal(sub("b", "B", "abcb"), "aBcb")
     assert_equal(sub("b", "B", "abcb", fixed=True), "aBcb")
     assert_equal(sub("b", "B", "abcb", ignore_case=True), "aBcb")
 
 
+def test_sub_fixed():
+    x = ["a.b.c", None, "..", np.nan]
+    assert_iterable_equal(
+        sub(".", "-", x, fixed=True), ["a-b.c", None, "-.", np.nan]
+    )
+    assert_iterable_equal(
+        gsub(".", "-", x, fixed=True), ["a-b-c", None, "--", np.nan]
+    )
+    out = gsub(".", "-", ["a.b", "c"], fixed=True)
+    assert out.dtype.kind == "U"
+    assert_iterable_equal(out, ["a-b", "c"])
+    # replacement is taken literally
+    assert_equal(sub("b", r"\1", "abc", fixed=True), r"a\1c")
+    assert_equal(sub("B", "x", "abc", fixed=True, ignore_case=True), "axc")
+
+
 def test_gsub():
     assert_equal(gsub("b", "B", "abcb"), "aBcB")
     assert_equal(gsub("b", "B", "abcb", fixed=True), "aBcB")
@@ -82,6 +125,30 @@ def test_strsplit():
     assert_iterable_equal(out[1], ["d", "e"])
 
 
+def test_strsplit_ragged():
+    out = strsplit(["a.b.c", "d", None, "e.f"], ".", fixed=True)
+    assert_equal(len(out), 4)
+    assert_iterable_equal(out.offsets, [0, 3, 4, 5, 7])
+    assert_iterable_equal(out[-1], ["e", "f"])
+    assert_iterable_equal(out[2], [np.nan])
+    assert_iterable_equal(lengths(out), [3, 1, 1, 2])
+    assert_iterable_equal(lengths(out[1:]), [1, 1, 2])
+    assert_iterable_equal(lengths(out[[3, 0]]), [2, 3])
+    assert_iterable_equal(out[[3, 0]][1], ["a", "b", "c"])
+    assert out.tolist()[0] == ["a", "b", "c"]
+    assert np.asarray(out).dtype == object
+    with pytest.raises(IndexError):
+        out[4]
+
+    out = strsplit(["a1b", "c-d"], [r"\d", "-"])
+    assert_iterable_equal(out[0], ["a", "b"])
+    assert_iterable_equal(out[1], ["c", "d"])
+
+    out = strsplit("a,b;c", [",", ";"], fixed=True)
+    assert_iterable_equal(out[0], ["a", "b;c"])
+    assert_iterable_equal(out[1], ["a,b", "c"])
+
+
 def test_paste():
     assert_equal(paste("a", "b", "c", sep="."), "a.b.c")
     assert_equal(paste(1, 2, 3, sep="."), "1.2.3")
@@ -94,6 +161,17 @@ def test_paste():
     )
 
 
+def test_paste_na():
+    assert_iterable_equal(
+        paste(["a", None, "c"], [1, 2, np.nan], sep="-"),
+        ["a-1.0", np.nan, np.nan],
+    )
+    assert_iterable_equal(paste(["a", "b"], "x"), ["a x", "b x"])
+    assert_iterable_equal(paste(["a", "b"], [], "x"), ["a x", "b x"])
+    assert_equal(paste(True, 1), "True 1")
+    assert_equal(len(paste()), 0)
+
+
 def test_paste0():
     assert_equal(paste0("a", "b", "c"), "abc")
     assert_iterable_equal(paste0(["a", "b"], ["c", "d"]), ["ac", "bd"])
@@ -107,11 +185,50 @@ def test_sprintf():
     )
 
 
+def test_sprintf_columnwise():
+    out = sprintf(
+        "%5s|%-3d|%05d|%.2f%%",
+        ["a", "bb"],
+        [1, 22],
+        [-42, 7],
+        [1.234, np.nan],
+    )
+    assert_iterable_equal(out, ["    a|1  |-0042|1.23%", "   bb|22 |00007|nan%"])
+    assert_iterable_equal(sprintf("%r-%s", "x", [1, 2]), ["'x'-1", "'x'-2"])
+    assert_iterable_equal(sprintf("%s %d", [None, True], [True, False]), [
+        "None 1", "True 0"
+    ])
+    assert_equal(sprintf("100%%"), "100%")
+
+
 def test_substr():
     assert_equal(substr("abc", 1, 2), "b")
     assert_equal(substr("abc", -2, -1), "b")
 
 
+def test_substr_bulk():
+    x = np.array(["", "a", "abc", "王ab", "hello world"])
+    for start, stop in [(0, 2), (1, 100), (-3, -1), (-100, 2), (2, 1)]:
+        assert_iterable_equal(
+            substr(x, start, stop), [s[start:stop] for s in x.tolist()]
+        )
+    assert_iterable_equal(
+        substr(x, [0, 0, 1, -2, 3], [1, 5, -1, 3, -2]),
+        ["", "a", "b", "ab", "lo wor"],
+    )
+    assert_iterable_equal(substring(x, [0, 1, -2, 1, 6]), [
+        "", "", "bc", "ab", "world"
+    ])
+    assert_iterable_equal(
+        substr(np.array(["abc", "de"], dtype=object), 0, 1), ["a", "d"]
+    )
+
+    out = substr(x, 0, 100)
+    assert not np.shares_memory(out, x)
+    out[0] = "z"
+    assert_equal(x[0], "")
+
+
 def test_substring():
     assert_equal(substring("abc", 1), "bc")
     assert_equal(substring("abc", 1, 2), "b")
@@ -134,6 +251,29 @@ def test_strtoi():
     assert_iterable_equal(strtoi(["1", "2"]), [1, 2])
 
 
+def test_strtoi_bulk():
+    assert_iterable_equal(
+        strtoi(["0x1F", "ff", "-0X10", " 7 ", "0b1", "g", None], 16),
+        [31, 255, -16, 7, 177, np.nan, np.nan],
+    )
+    assert_iterable_equal(
+        strtoi(["0x1F", "0o17", "0b101", "42", "010", "00"], 0),
+        [31, 15, 5, 42, 8, 0],
+    )
+    # a leading 0 means octal with base 0, like R
+    assert_iterable_equal(
+        strtoi(["077", "-077", "08", "0" * 30 + "77"], 0),
+        [63, -63, np.nan, 63],
+    )
+    assert_iterable_equal(strtoi(["101", "2", "0b11"], 2), [5, np.nan, 3])
+    assert_iterable_equal(strtoi(["1_000", "٣"], 10), [1000, 3])
+    assert strtoi(["9223372036854775807"], 10)[0] == 2**63 - 1
+    assert_iterable_equal(strtoi(["9223372036854775808"], 10), [np.nan])
+    for base in (1, 37, -2):
+        with pytest.raises(ValueError, match="base"):
+            strtoi(["1"], base)
+
+
 def test_trimws():
     assert_equal(trimws(" a b "), "a b")
     assert_equal(trimws(" a b ", "left"), "a b ")
@@ -158,6 +298,16 @@ def test_chartr():
     assert_iterable_equal(chartr("a", "b", ["a", "b"]), ["b", "b"])
 
 
+def test_chartr_one_pass():
+    # no chained replacements
+    assert_equal(chartr("ab", "ba", "aabb"), "bbaa")
+    assert_iterable_equal(
+        chartr("a王", "王a", ["a王b", None, "c"]), ["王ab", None, "c"]
+    )
+    assert_equal(chartr("abc", "x", "abc"), "xbc")
+    assert_iterable_equal(chartr("", "", ["ab"]), ["ab"])
+
+
 def test_nchar():
     assert_equal(nchar("abc"), 3)
     assert_equal(nchar("abc", type_="width"), 3)
@@ -172,6 +322,26 @@ def test_nchar():
         nchar("abc", type_="badtypes")
 
 
+def test_nchar_bulk():
+    x = ["ab", "王a", "\ta", "", "😀"]
+    assert_iterable_equal(nchar(x), [2, 3, -1, 0, 2])
+    assert_iterable_equal(nchar(x, type_="chars"), [2, 2, 2, 0, 1])
+    assert_iterable_equal(nchar(x, type_="bytes"), [2, 4, 2, 0, 4])
+    assert_iterable_equal(
+        nchar(["ab", None], type_="chars", keep_na=True), [2, np.nan]
+    )
+    assert_iterable_equal(
+        nchar(["ab", None], type_="chars", keep_na=None), [2, np.nan]
+    )
+    assert_iterable_equal(nchar(["ab", None], keep_na=None), [2, 2])
+    assert_iterable_equal(nchar([12, 3456], type_="chars"), [2, 4])
+    assert_iterable_equal(
+        nchar(["a", "\ud800"], type_="bytes"), [1, np.nan]
+    )
+    with pytest.raises(UnicodeEncodeError):
+        nchar(["a", "\ud800"], type_="bytes", allow_na=False)
+
+
 def test_nzchar():
     assert_equal(nzchar("abc"), True)
     assert_iterable_equal(nzchar(["a", ""]), [True, False])
@@ -1,8 +1,8 @@
 import pytest  # noqa
 import numpy as np
 from datar.core import plugin  # noqa
-from datar_numpy.utils import is_scalar, make_array
-from .utils import assert_iterable_equal
+from datar_numpy.utils import is_null, is_scalar, make_array, PatternCache
+from .utils import assert_equal, assert_iterable_equal
 
 
 def test_is_scalar():
@@ -10,6 +10,32 @@ def test_is_scalar():
     assert is_scalar(np.ndarray)
 
 
+def test_is_null():
+    assert is_null(None)
+    assert is_null(np.nan)
+    assert not is_null(1)
+    assert not is_null("a")
+    assert is_null(np.datetime64("NaT"))
+    assert not is_null(np.array(1.0))
+    assert_iterable_equal(is_null([1, np.nan]), [False, True])
+    assert_iterable_equal(is_null(["a", np.nan]), [False, True])
+    assert_iterable_equal(is_null(np.array(["a", "nan"])), [False, False])
+    assert_iterable_equal(is_null(np.array([1, 2])), [False, False])
+    assert_iterable_equal(
+        is_null(np.array(["2020-01-01", "NaT"], dtype="datetime64[D]")),
+        [False, True],
+    )
+    assert_iterable_equal(
+        is_null(np.array(["a", None, np.nan, 1, [1]], dtype=object)),
+        [False, True, True, False, False],
+    )
+    # elements that can't be compared as scalars
+    x = np.empty(2, dtype=object)
+    x[0] = np.array([1, 2])
+    assert_iterable_equal(is_null(x), [False, True])
+    assert is_null(np.array([[1.0, np.nan]])).shape == (1, 2)
+
+
 def test_make_array():
     assert_iterable_equal(make_array(1), [1])
     assert_iterable_equal(make_array([1, 2]), [1, 2])
@@ -17,3 +43,39 @@ def test_make_array():
     # assert_iterable_equal(make_array({"a": 1, "b": 2}), ["a", "b"])
     assert_iterable_equal(make_array(["1", "2"], dtype=int), [1, 2])
     assert_iterable_equal(make_array(["1", np.nan]), ["1", np.nan])
+
+
+def test_make_array_nan_strings():
+    assert_iterable_equal(make_array(["a", "nan"]), ["a", "nan"])
+    assert make_array(["a", "nan"]).dtype.kind == "U"
+    assert_iterable_equal(make_array(("a", np.nan, 1)), ["a", np.nan, 1])
+    assert_iterable_equal(
+        make_array([["a", np.nan]])[0], ["a", np.nan]
+    )
+
+
+def test_pattern_cache():
+    cache = PatternCache(maxsize=2)
+    p1 = cache.get("a.")
+    assert cache.get("a.") is p1
+    assert_equal(cache.hits, 1)
+    assert_equal(cache.misses, 1)
+
+    # fixed patterns are escaped and cached separately
+    assert cache.get("a.", fixed=True).search("ab") is None
+    assert_equal(cache.misses, 2)
+
+    cache.get("b")
+    assert_equal(len(cache), 2)
+    # "a." is the least recently used one and evicted
+    cache.get("a.")
+    assert_equal(cache.misses, 4)
+
+    cache.maxsize = 1
+    assert_equal(len(cache), 1)
+    with pytest.raises(ValueError):
+        cache.maxsize = -1
+
+    cache.clear()
+    assert_equal(len(cache), 0)
+    assert_equal(cache.hits, 0)